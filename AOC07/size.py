@@ -1,99 +1,103 @@
-import os
-# ls gives directories
-
-# I can make a "file" class with: 
-# type - folder/file 
-# children - [list]
-# size 
-
-
-
-class File: 
-    def __init__(self, name, type, parent, size):
-        name = name 
-        type = type
-        #children = children 
-        parent = parent
-        size = size
-
-# parse input into a list? 
-files = {}
-
-file_path = 'AOC07/input.txt'
-
-with open(file_path, 'r') as file:
-    input = file.read()
-
-lines = input.split("\n")
-
-list_2d = [line.split() for line in lines]
-print("list: ", list_2d[:10])
-
-# $ cd name 
-# $ ls 
-# $ cd ".." (going up a level?)
-# single dot exists - a file name -> size exists 
-
-# loop needs to record file names and sizes
-
-current_path = "/"
-filesystem = {} 
-# 
-for line in list_2d:
-    if line[0] == "$":
-        if line[1] == "cd":
-            if line[2] == "..":
-                # Go up: remove last part of current path
-                current_path = "/".join(current_path.rstrip("/").split("/")[:-1]) or "/" 
-            elif line[2] == "/":
-                current_path = "/" 
-            else:    
-                # go down: add to path
-                current_path = current_path.rstrip("/") + "/" + line[2]
-        
-    elif line[0] == "dir":
-        # add subdirectory to current path
-        dir_name = line[1]
-        if current_path not in filesystem:
-            filesystem[current_path] = {"files": [], "subdirs": []}
-        filesystem[current_path]["subdirs"].append(dir_name)
-
-    else:
-        # add files to current path
-        file_size = int(line[0])
-        file_name = line[1]
-        if current_path not in filesystem:
-            filesystem[current_path] = {"files": [], "subdirs": []}
-        filesystem[current_path]["files"].append((file_name, file_size))
-
-# Function to calculate directory size recursively
-def calculate_dir_size(dir_path):
-    if dir_path not in filesystem:
-        return 0
-    
-    total_size = 0
-    
-    # Add size of files in this directory
-    for file_name, file_size in filesystem[dir_path]["files"]:
-        total_size += file_size
-    
-    # Add size of subdirectories recursively
-    for subdir in filesystem[dir_path]["subdirs"]:
-        subdir_path = dir_path.rstrip("/") + "/" + subdir
-        total_size += calculate_dir_size(subdir_path)
-    
-    return total_size
-
-# Calculate sizes for all directories
-dir_sizes = {}
-for dir_path in filesystem:
-    dir_sizes[dir_path] = calculate_dir_size(dir_path)
-
-# Find directories with size <= 100000
-small_dirs = {path: size for path, size in dir_sizes.items() if size <= 100000}
-
-print("Small directories (<= 100000):")
-for path, size in small_dirs.items():
-    print(f"{path}: {size}")
-
-print(f"\nSum of small directories: {sum(small_dirs.values())}")
+import sys
+import typing as tp
+from concurrent.futures import ProcessPoolExecutor
+
+# Transcript lines look like:
+# $ cd name    (go down a level; ".." goes up, "/" goes to the root)
+# $ ls         (followed by its output)
+# dir name     (a subdirectory of the current directory)
+# 1234 name    (a file and its size)
+
+
+def change_dir(current_path: str, target: str) -> str:
+    """Returns the path reached by running `cd target` from current_path."""
+    if target == "..":
+        # Go up: remove last part of current path
+        return "/".join(current_path.rstrip("/").split("/")[:-1]) or "/"
+    if target == "/":
+        return "/"
+    # go down: add to path
+    return current_path.rstrip("/") + "/" + target
+
+
+def parse_transcript(lines: tp.Iterable[str]) -> tp.Dict[str, int]:
+    """
+    Stream-parses a shell transcript, one line at a time, into the total size of
+    the files directly inside each directory. Memory is proportional to the number
+    of directories, not the length of the transcript.
+    """
+    direct_sizes = {"/": 0}
+    listed = set()
+    current_path = "/"
+    skip_listing = False
+
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+
+        if parts[0] == "$":
+            skip_listing = False
+            if parts[1] == "cd":
+                current_path = change_dir(current_path, parts[2])
+                direct_sizes.setdefault(current_path, 0)
+            elif parts[1] == "ls":
+                # A directory listed twice would otherwise have its files counted twice.
+                skip_listing = current_path in listed
+                listed.add(current_path)
+        elif skip_listing:
+            continue
+        elif parts[0] == "dir":
+            direct_sizes.setdefault(change_dir(current_path, parts[1]), 0)
+        else:
+            direct_sizes[current_path] += int(parts[0])
+
+    return direct_sizes
+
+
+def compute_dir_sizes(direct_sizes: tp.Dict[str, int]) -> tp.Dict[str, int]:
+    """
+    Computes the total size of every directory in one post-order pass: directories
+    are visited deepest first, and each adds its finished total to its parent.
+    """
+    def depth(path: str) -> int:
+        return 0 if path == "/" else path.count("/")
+
+    dir_sizes = dict(direct_sizes)
+    for path in sorted(dir_sizes, key=depth, reverse=True):
+        if path != "/":
+            parent = path.rsplit("/", 1)[0] or "/"
+            dir_sizes[parent] += dir_sizes[path]
+    return dir_sizes
+
+
+def analyze_transcript(file_path: str) -> tp.Dict[str, int]:
+    """Returns the size of every directory described by the transcript at file_path."""
+    with open(file_path, "r") as file:
+        return compute_dir_sizes(parse_transcript(file))
+
+
+def analyze_transcripts(file_paths: tp.Sequence[str], processes: int = 1) -> tp.Dict[str, tp.Dict[str, int]]:
+    """
+    Analyzes several transcripts, returning {file_path: {dir_path: size}}.
+    With processes > 1 the transcripts are split across a process pool.
+    """
+    if processes <= 1 or len(file_paths) <= 1:
+        return {file_path: analyze_transcript(file_path) for file_path in file_paths}
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return dict(zip(file_paths, pool.map(analyze_transcript, file_paths)))
+
+
+if __name__ == "__main__":
+    file_path = sys.argv[1] if len(sys.argv) > 1 else 'AOC07/input.txt'
+    dir_sizes = analyze_transcript(file_path)
+
+    # Find directories with size <= 100000
+    small_dirs = {path: size for path, size in dir_sizes.items() if size <= 100000}
+
+    print("Small directories (<= 100000):")
+    for path, size in small_dirs.items():
+        print(f"{path}: {size}")
+
+    print(f"\nSum of small directories: {sum(small_dirs.values())}")
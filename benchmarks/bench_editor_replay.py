@@ -0,0 +1,179 @@
+"""
+Replays command traces against TextEditorImpl and reports per-operation latency
+percentiles and history memory, for one or more starting document sizes.
+
+Traces are either synthetic (a random mix of typing, deletes, moves, selections,
+cut/paste and undo/redo bursts) or recorded: one JSON array per line holding the
+operation name and its arguments, e.g. ["APPEND", "hello"] or ["MOVE", 3], as in
+the editor's tests. --save-trace writes the synthetic trace in that format.
+
+--profile prints the functions with the most cumulative time under cProfile, and
+--tracemalloc the lines that allocated the most memory during the replay.
+
+Usage: python benchmarks/bench_editor_replay.py [--doc-sizes 1KB,1MB,50MB] [--ops 20000]
+       [--trace FILE] [--lazy] [--coalesce-window 0] [--history-limit N] [--profile] [--tracemalloc]
+"""
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import random
+import sys
+import time
+import tracemalloc
+import typing as tp
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+from text_editor_impl import TextEditorImpl
+
+Command = tp.List[tp.Any]
+
+_UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "B": 1}
+
+
+def parse_size(size: str) -> int:
+    """Parses sizes such as 1KB, 50MB or 4096."""
+    size = size.strip().upper()
+    for unit, factor in _UNITS.items():
+        if size.endswith(unit):
+            return int(float(size[:-len(unit)]) * factor)
+    return int(size)
+
+
+def make_document(size: int) -> str:
+    line = "The quick brown fox jumps over the lazy dog.\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+def synthetic_trace(rng: random.Random, ops: int, length: tp.Callable[[], int]) -> tp.Iterator[Command]:
+    """
+    Yields a random editing session of `ops` commands. Positions are chosen from the
+    current document length, so the trace is generated while it is replayed.
+    """
+    for _ in range(ops):
+        roll = rng.random()
+        size = length()
+        if roll < 0.45:
+            yield ["APPEND", rng.choice("abcdefghijklmnopqrstuvwxyz \n")]
+        elif roll < 0.55:
+            yield ["DELETE"]
+        elif roll < 0.65:
+            yield ["MOVE", rng.randint(0, size)]
+        elif roll < 0.72:
+            start = rng.randint(0, size)
+            yield ["SELECT", start, min(size, start + rng.randint(1, 200))]
+        elif roll < 0.76:
+            yield ["CUT"]
+        elif roll < 0.80:
+            yield ["PASTE"]
+        elif roll < 0.85:
+            yield ["APPEND", "".join(rng.choice("lorem ipsum ") for _ in range(rng.randint(2, 80)))]
+        elif roll < 0.95:
+            for _ in range(rng.randint(1, 5)):
+                yield ["UNDO"]
+        else:
+            for _ in range(rng.randint(1, 5)):
+                yield ["REDO"]
+
+
+def read_trace(path: str) -> tp.Iterator[Command]:
+    with open(path) as trace_file:
+        for line in trace_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def percentile(sorted_values: tp.List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def replay(editor: TextEditorImpl, commands: tp.Iterable[Command],
+           recorded: tp.Optional[tp.List[Command]] = None) -> tp.Dict[str, tp.List[float]]:
+    """Runs the commands and returns the latencies, in seconds, of each operation."""
+    latencies: tp.Dict[str, tp.List[float]] = {}
+    clock = time.perf_counter
+    for command in commands:
+        name, args = command[0].upper(), command[1:]
+        method = getattr(editor, name.lower())
+        start = clock()
+        method(*args)
+        latencies.setdefault(name, []).append(clock() - start)
+        if recorded is not None:
+            recorded.append(command)
+    return latencies
+
+
+def report(latencies: tp.Dict[str, tp.List[float]], editor: TextEditorImpl, elapsed: float):
+    total = sum(len(values) for values in latencies.values())
+    print(f"  {total:,} ops in {elapsed:.2f}s ({total / elapsed:,.0f} ops/s), "
+          f"{len(editor._doc):,} chars, history {editor.history_size():,} bytes "
+          f"in {len(editor._undo_stack):,} undo / {len(editor._redo_stack):,} redo entries")
+    print(f"  {'op':8s} {'count':>8s} {'p50 us':>10s} {'p90 us':>10s} {'p99 us':>10s} {'max us':>10s}")
+    for name in sorted(latencies):
+        values = sorted(latencies[name])
+        cells = [percentile(values, fraction) * 1e6 for fraction in (0.5, 0.9, 0.99, 1.0)]
+        print(f"  {name:8s} {len(values):>8,} " + " ".join(f"{cell:>10,.1f}" for cell in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doc-sizes", default="1KB,1MB", help="comma-separated starting document sizes")
+    parser.add_argument("--ops", type=int, default=20000, help="commands in the synthetic trace")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace", help="replay this recorded trace instead of a synthetic one")
+    parser.add_argument("--save-trace", help="write the commands replayed (for the last document size) to this file")
+    parser.add_argument("--lazy", action="store_true")
+    parser.add_argument("--coalesce-window", type=float, default=0)
+    parser.add_argument("--history-limit", type=int, default=None)
+    parser.add_argument("--profile", action="store_true", help="print the hottest functions under cProfile")
+    parser.add_argument("--tracemalloc", action="store_true", help="print the top allocation sites")
+    parser.add_argument("--top", type=int, default=15, help="rows to show for --profile and --tracemalloc")
+    args = parser.parse_args()
+
+    for size in map(parse_size, args.doc_sizes.split(",")):
+        print(f"document {size:,} chars")
+        editor = TextEditorImpl(history_limit=args.history_limit, lazy=args.lazy,
+                                coalesce_window=args.coalesce_window)
+        editor.append(make_document(size))
+        editor.move(size // 2)
+
+        if args.trace:
+            commands = read_trace(args.trace)
+        else:
+            commands = synthetic_trace(random.Random(args.seed), args.ops, lambda: len(editor._doc))
+        recorded: tp.Optional[tp.List[Command]] = [] if args.save_trace else None
+
+        profiler = cProfile.Profile() if args.profile else None
+        if args.tracemalloc:
+            tracemalloc.start()
+        if profiler is not None:
+            profiler.enable()
+        start = time.perf_counter()
+        latencies = replay(editor, commands, recorded)
+        elapsed = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+
+        report(latencies, editor, elapsed)
+        if args.tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  tracemalloc: current {current:,} bytes, peak {peak:,} bytes")
+            for stat in snapshot.statistics("lineno")[:args.top]:
+                print(f"    {stat}")
+        if profiler is not None:
+            pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(args.top)
+
+        if recorded is not None:
+            with open(args.save_trace, "w") as trace_file:
+                trace_file.writelines(json.dumps(command) + "\n" for command in recorded)
+
+
+if __name__ == "__main__":
+    main()
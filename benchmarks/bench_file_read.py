@@ -0,0 +1,64 @@
+"""
+Compares sequential reads through FileStorageSystemImpl.read_file (memoryview
+slices over an mmap) against plain open().read() calls on the same data.
+
+Usage: python benchmarks/bench_file_read.py [--size-mb 256] [--chunk-kb 64]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+from file_storage_system_impl import FileStorageSystemImpl
+
+
+def bench_read_file(system: FileStorageSystemImpl, file_path: str, size: int, chunk: int) -> float:
+    """Streams the file through read_file and returns the elapsed seconds."""
+    start = time.perf_counter()
+    for offset in range(0, size, chunk):
+        view = system.read_file(file_path, offset, min(chunk, size - offset))
+        view.release()
+    return time.perf_counter() - start
+
+
+def bench_open_read(backing_path: str, chunk: int) -> float:
+    """Streams the file through open().read() and returns the elapsed seconds."""
+    start = time.perf_counter()
+    with open(backing_path, "rb") as f:
+        while f.read(chunk):
+            pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--chunk-kb", type=int, default=64)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    chunk = args.chunk_kb * 1024
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        system = FileStorageSystemImpl(storage_dir)
+        system.add_file_with_contents("/bench/data.bin", "admin", os.urandom(size))
+        backing_path, _ = system.contents["/bench/data.bin"]
+
+        # Warm the page cache so both readers measure the same thing.
+        bench_open_read(backing_path, chunk)
+
+        mmap_seconds = bench_read_file(system, "/bench/data.bin", size, chunk)
+        read_seconds = bench_open_read(backing_path, chunk)
+        system.close()
+
+    print(f"size={args.size_mb}MB chunk={args.chunk_kb}KB")
+    print(f"read_file (mmap):  {mmap_seconds:.4f}s  {args.size_mb / mmap_seconds:,.0f} MB/s")
+    print(f"open().read():     {read_seconds:.4f}s  {args.size_mb / read_seconds:,.0f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
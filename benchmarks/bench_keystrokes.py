@@ -0,0 +1,51 @@
+"""
+Replays a burst of single-character typing into the middle of a document and
+compares the default editor with a lazy, coalescing one.
+
+Usage: python benchmarks/bench_keystrokes.py [--doc-kb 1024] [--keys 5000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+from text_editor_impl import TextEditorImpl
+
+
+def replay(editor: TextEditorImpl, doc: str, keys: str) -> float:
+    """Types keys at the middle of doc and returns the elapsed seconds."""
+    editor.append(doc)
+    editor.move(len(doc) // 2)
+    start = time.perf_counter()
+    for key in keys:
+        editor.append(key)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doc-kb", type=int, default=1024)
+    parser.add_argument("--keys", type=int, default=5000)
+    args = parser.parse_args()
+
+    doc = ("lorem ipsum dolor sit amet\n" * (args.doc_kb * 1024 // 27 + 1))[:args.doc_kb * 1024]
+    keys = "".join(random.choice("abcdefghijklmnopqrstuvwxyz ") for _ in range(args.keys))
+
+    configs = [
+        ("default", {}),
+        ("coalescing", {"coalesce_window": 1.0}),
+        ("lazy + coalescing", {"lazy": True, "coalesce_window": 1.0}),
+    ]
+    for name, options in configs:
+        editor = TextEditorImpl(**options)
+        elapsed = replay(editor, doc, keys)
+        print(f"{name:18s} {args.keys / elapsed:>12,.0f} keys/s  "
+              f"history entries={len(editor._undo_stack):>6}  history bytes={editor.history_size():>9,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Builds a TimeTrackingSystemImpl with many workers, each with a history of work
+sessions and some with a promotion, then times a monthly payroll computed with
+one calc_salary call per worker against a single calc_payroll call.
+
+Usage: python benchmarks/bench_payroll.py [--workers 100000] [--sessions 20] [--promoted 0.1]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+from time_tracking_system_impl import TimeTrackingSystemImpl
+
+DAY = 24
+
+
+def build_system(workers: int, sessions: int, promoted: float, rng: random.Random) -> TimeTrackingSystemImpl:
+    """Gives every worker one session a day, promoting some of them halfway through."""
+    system = TimeTrackingSystemImpl()
+    for i in range(workers):
+        worker_id = f"worker{i}"
+        system.add_worker(worker_id, rng.choice(["Developer", "Designer", "Manager"]), rng.randint(10, 100))
+        if rng.random() < promoted:
+            system.promote(worker_id, "Lead", rng.randint(100, 200), sessions // 2 * DAY)
+        for day in range(sessions):
+            start = day * DAY + rng.randint(0, 4)
+            system.register(start, worker_id)
+            system.register(start + rng.randint(4, 10), worker_id)
+    return system
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=100000)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--promoted", type=float, default=0.1, help="fraction of workers promoted")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    system = build_system(args.workers, args.sessions, args.promoted, random.Random(args.seed))
+    print(f"setup: {args.workers:,} workers x {args.sessions} sessions in {time.perf_counter() - start:.2f}s")
+
+    # A period that cuts through sessions at both ends
+    period = (DAY // 2, (args.sessions - 1) * DAY + 6)
+
+    start = time.perf_counter()
+    one_by_one = {worker_id: int(system.calc_salary(worker_id, *period)) for worker_id in system.workers_}
+    per_worker = time.perf_counter() - start
+
+    start = time.perf_counter()
+    payroll = system.calc_payroll(*period)
+    bulk = time.perf_counter() - start
+
+    assert payroll == one_by_one
+    print(f"calc_salary per worker {per_worker:.3f}s  ({args.workers / per_worker:,.0f} workers/s)")
+    print(f"calc_payroll           {bulk:.3f}s  ({args.workers / bulk:,.0f} workers/s)")
+
+
+if __name__ == "__main__":
+    main()
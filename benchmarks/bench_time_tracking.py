@@ -0,0 +1,225 @@
+"""
+Measures how TimeTrackingSystemImpl's queries degrade as history grows: for each
+history size (sessions per worker), builds a system from generated shift patterns
+and promotion schedules, then reports per-call latency percentiles of get,
+calc_salary, top_n_workers, total_time_between and register, plus the memory the
+system holds per clock event (from tracemalloc, so build times include its
+overhead).
+
+Shifts are a mix of day, night and split shifts with jittered start times and
+weekends off; a fraction of workers gets one or more queued promotions spread over
+their history.
+
+--json writes the results as JSON. Given --baseline (an earlier --json output),
+the run fails with exit status 1 if any operation's p50 at any size is more than
+--threshold times slower than the baseline's. --max-growth also fails it if any
+operation's p50 at the largest size is that many times its p50 at the smallest.
+
+Usage: python benchmarks/bench_time_tracking.py [--workers 1000] [--sizes 10,100,1000]
+       [--queries 2000] [--json FILE] [--baseline FILE] [--threshold 1.5] [--max-growth N]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import typing as tp
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+from time_tracking_system_impl import TimeTrackingSystemImpl
+
+DAY = 24 * 60  # Timestamps are in minutes
+POSITIONS = ["Developer", "Designer", "Manager", "Support"]
+PROMOTIONS = ["Senior", "Lead", "Principal"]
+
+Shift = tp.Tuple[int, int]
+
+
+def shift_pattern(rng: random.Random, days: int) -> tp.Iterator[Shift]:
+    """
+    Yields one worker's (start, end) shifts over enough days for `days` workdays.
+    Day shifts start around 9:00, night shifts around 22:00 and split shifts come
+    as a morning and an evening block; starts and lengths are jittered.
+    """
+    kind = rng.choice(["day", "day", "night", "split"])
+    day = workdays = 0
+    while workdays < days:
+        if day % 7 < 5:  # Weekends off
+            base = day * DAY
+            if kind == "day":
+                start = base + 9 * 60 + rng.randint(-30, 30)
+                yield start, start + 8 * 60 + rng.randint(-20, 60)
+            elif kind == "night":
+                start = base + 22 * 60 + rng.randint(-15, 15)
+                yield start, start + 7 * 60 + rng.randint(0, 30)
+            else:
+                start = base + 7 * 60 + rng.randint(0, 20)
+                yield start, start + 4 * 60
+                start = base + 16 * 60 + rng.randint(0, 20)
+                yield start, start + 4 * 60
+            workdays += 1
+        day += 1
+
+
+def promotion_schedule(rng: random.Random, horizon: int, promoted: float) -> tp.List[tp.Tuple[str, int, int]]:
+    """Returns the (position, compensation, effective time) promotions of one worker, if any."""
+    if rng.random() >= promoted:
+        return []
+    count = rng.randint(1, len(PROMOTIONS))
+    times = sorted(rng.randint(DAY, max(DAY, horizon)) for _ in range(count))
+    return [(PROMOTIONS[i], 60 + 20 * i, times[i]) for i in range(count)]
+
+
+def build_system(workers: int, sessions: int, promoted: float,
+                 rng: random.Random) -> tp.Tuple[TimeTrackingSystemImpl, int, int]:
+    """
+    Builds a system with `sessions` shifts per worker, registered in time order as a
+    badge reader would send them. Returns it with its clock event count and the time
+    of the last event.
+    """
+    system = TimeTrackingSystemImpl()
+    events: tp.List[tp.Tuple[int, str]] = []
+    for i in range(workers):
+        worker_id = f"worker{i}"
+        system.add_worker(worker_id, rng.choice(POSITIONS), rng.randint(20, 50))
+        shifts = list(shift_pattern(rng, sessions))[:sessions]
+        for position, compensation, effective in promotion_schedule(rng, shifts[-1][1], promoted):
+            system.promote(worker_id, position, compensation, effective)
+        for start, end in shifts:
+            events.append((start, worker_id))
+            events.append((end, worker_id))
+    events.sort()
+    for timestamp, worker_id in events:
+        system.register(timestamp, worker_id)
+    return system, len(events), events[-1][0]
+
+
+def percentile(sorted_values: tp.List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def time_calls(calls: tp.Iterable[tp.Callable[[], tp.Any]]) -> tp.Dict[str, float]:
+    """Runs the calls and returns their latency percentiles in microseconds."""
+    clock = time.perf_counter
+    latencies = []
+    for call in calls:
+        start = clock()
+        call()
+        latencies.append(clock() - start)
+    latencies.sort()
+    return {f"p{int(fraction * 100)}_us": round(percentile(latencies, fraction) * 1e6, 2)
+            for fraction in (0.5, 0.9, 0.99)}
+
+
+def measure(system: TimeTrackingSystemImpl, end: int, queries: int,
+            rng: random.Random) -> tp.Dict[str, tp.Dict[str, float]]:
+    worker_ids = list(system.workers_)
+
+    def salary_query() -> tp.Callable[[], tp.Any]:
+        worker_id = rng.choice(worker_ids)
+        start = rng.randint(0, end)
+        stop = start + rng.randint(DAY, 30 * DAY)
+        return lambda: system.calc_salary(worker_id, start, stop)
+
+    def range_query() -> tp.Callable[[], tp.Any]:
+        start = rng.randint(0, end)
+        stop = start + rng.randint(DAY, 30 * DAY)
+        return lambda: system.total_time_between(start, stop)
+
+    ops = {
+        "get": lambda: time_calls(lambda worker_id=rng.choice(worker_ids): system.get(worker_id)
+                                  for _ in range(queries)),
+        "calc_salary": lambda: time_calls(salary_query() for _ in range(queries)),
+        "top_n_workers": lambda: time_calls(lambda position=rng.choice(POSITIONS + PROMOTIONS):
+                                            system.top_n_workers(10, position) for _ in range(queries)),
+        "total_time_between": lambda: time_calls(range_query() for _ in range(queries)),
+    }
+    results = {name: op() for name, op in ops.items()}
+    # A clock-in and a clock-out per worker, after everything else
+    results["register"] = time_calls(lambda timestamp=end + 1 + offset, worker_id=worker_id:
+                                     system.register(timestamp, worker_id)
+                                     for offset in (0, 60) for worker_id in worker_ids[:queries])
+    return results
+
+
+def check(results: tp.Dict[str, tp.Any], baseline: tp.Optional[tp.Dict[str, tp.Any]],
+          threshold: float, max_growth: tp.Optional[float]) -> tp.List[str]:
+    """Returns a message for every regression found."""
+    failures = []
+    sizes = results["sizes"]
+    if baseline is not None:
+        for size, run in sizes.items():
+            for name, latency in run["ops"].items():
+                before = baseline["sizes"].get(size, {}).get("ops", {}).get(name)
+                if before and before["p50_us"] > 0 and latency["p50_us"] > threshold * before["p50_us"]:
+                    failures.append(f"{name} at {size} sessions: p50 {latency['p50_us']}us, "
+                                    f"baseline {before['p50_us']}us (threshold {threshold}x)")
+    if max_growth is not None and len(sizes) > 1:
+        smallest, largest = sizes[min(sizes, key=int)], sizes[max(sizes, key=int)]
+        for name, latency in largest["ops"].items():
+            first = smallest["ops"][name]["p50_us"]
+            if first > 0 and latency["p50_us"] > max_growth * first:
+                failures.append(f"{name}: p50 grew from {first}us to {latency['p50_us']}us "
+                                f"(max growth {max_growth}x)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=1000)
+    parser.add_argument("--sizes", default="10,100,1000", help="comma-separated sessions per worker")
+    parser.add_argument("--promoted", type=float, default=0.2, help="fraction of workers with promotions")
+    parser.add_argument("--queries", type=int, default=2000, help="calls timed per operation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="fail on regressions against this earlier --json output")
+    parser.add_argument("--threshold", type=float, default=1.5, help="allowed p50 slowdown against the baseline")
+    parser.add_argument("--max-growth", type=float, default=None,
+                        help="allowed p50 growth from the smallest to the largest size")
+    args = parser.parse_args()
+
+    results: tp.Dict[str, tp.Any] = {"workers": args.workers, "promoted": args.promoted, "sizes": {}}
+    print(f"{'sessions':>8s} {'events':>10s} {'build s':>8s} {'B/event':>8s}  p50 us: "
+          + " ".join(f"{name:>12s}" for name in ("get", "calc_salary", "top_n", "range", "register")))
+    for sessions in map(int, args.sizes.split(",")):
+        rng = random.Random(args.seed)
+        tracemalloc.start()
+        start = time.perf_counter()
+        system, events, end = build_system(args.workers, sessions, args.promoted, rng)
+        build_seconds = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        ops = measure(system, end, args.queries, rng)
+        results["sizes"][str(sessions)] = {
+            "events": events,
+            "build_seconds": round(build_seconds, 3),
+            "bytes_per_event": round(memory / events, 1),
+            "ops": ops,
+        }
+        print(f"{sessions:>8,} {events:>10,} {build_seconds:>8.2f} {memory / events:>8.1f}          "
+              + " ".join(f"{op['p50_us']:>12.2f}" for op in ops.values()))
+
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    failures = check(results, baseline, args.threshold, args.max_growth)
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
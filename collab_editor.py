@@ -0,0 +1,276 @@
+import typing as tp
+
+# (Lamport counter, site id): unique per element and totally ordered.
+ElementId = tp.Tuple[int, str]
+
+# Blocks are split once they hold twice this many elements, so locating an
+# offset scans O(n / _BLOCK_SIZE) block counts plus one block.
+_BLOCK_SIZE = 256
+
+class Operation(tp.NamedTuple):
+    """
+    One replicated change. An insert puts `char` right after the element `ref`
+    (None for the start of the document) under the new id `id`; a delete removes
+    the element `id`. A revive is an insert that brings back the deleted element
+    `ref` (an undone delete) and records `id` as its replacement.
+    """
+    kind: str  # "insert", "delete" or "revive"
+    id: ElementId
+    ref: tp.Optional[ElementId] = None
+    char: str = ""
+
+class _Element:
+    __slots__ = ("id", "char", "deleted", "block")
+
+    def __init__(self, element_id: ElementId, char: str, block: "_Block"):
+        self.id = element_id
+        self.char = char
+        self.deleted = False
+        self.block = block
+
+class _Block:
+    __slots__ = ("elements", "visible")
+
+    def __init__(self, elements: tp.List[_Element]):
+        self.elements = elements
+        self.visible = sum(not element.deleted for element in elements)
+
+class CollabReplica:
+    """
+    One site's copy of a shared document, kept as an RGA sequence CRDT.
+
+    Every character ever inserted is an element with a unique id; deleted ones
+    stay behind as tombstones so later operations can still refer to them.
+    Concurrent inserts after the same element are ordered by descending id,
+    which makes every replica converge to the same text no matter the order
+    operations arrive in. Operations whose dependencies have not arrived yet
+    are buffered until they do.
+
+    Several local sessions (users) can edit through one replica. Their
+    operations are collected in an outbox for the caller to broadcast to the
+    other replicas, which apply them with receive().
+    """
+
+    def __init__(self, site_id: str):
+        """Initializes an empty document for the site `site_id`, which must be unique."""
+        self.site_id = site_id
+        self._clock = 0
+        # Elements in document order, tombstones included
+        self._blocks: tp.List[_Block] = [_Block([])]
+        self._elements: tp.Dict[ElementId, _Element] = {}
+        # {deleted element id: id of the element that revived it}
+        self._revived: tp.Dict[ElementId, ElementId] = {}
+        # {missing element id: operations waiting for it}
+        self._waiting: tp.Dict[ElementId, tp.List[Operation]] = {}
+        self._outgoing: tp.List[Operation] = []
+        self._sessions: tp.Dict[str, "CollabSession"] = {}
+
+    def session(self, user_id: str) -> "CollabSession":
+        """Returns the user's session on this replica, creating it if needed."""
+        if user_id not in self._sessions:
+            self._sessions[user_id] = CollabSession(self, user_id)
+        return self._sessions[user_id]
+
+    def get_text(self) -> str:
+        return "".join(element.char for block in self._blocks for element in block.elements
+                       if not element.deleted)
+
+    def __len__(self) -> int:
+        return sum(block.visible for block in self._blocks)
+
+    def take_outgoing(self) -> tp.List[Operation]:
+        """Returns the operations made locally since the last call, for broadcasting."""
+        outgoing, self._outgoing = self._outgoing, []
+        return outgoing
+
+    def pending(self) -> int:
+        """Returns the number of received operations still waiting for their dependencies."""
+        return sum(len(operations) for operations in self._waiting.values())
+
+    def receive(self, operations: tp.Iterable[Operation]):
+        """
+        Applies operations from other replicas. Duplicates are ignored. Operations may
+        also be plain sequences of their fields, as read back from the wire.
+        """
+        for fields in operations:
+            kind, element_id, ref, char = Operation(*fields)
+            # Serializers like JSON turn the id tuples into lists, which cannot be keys.
+            operation = Operation(kind, tuple(element_id), None if ref is None else tuple(ref), char)
+            self._clock = max(self._clock, operation.id[0])
+            self._deliver(operation)
+
+    # --------------------------------------------------------------------------
+    # Integration
+    # --------------------------------------------------------------------------
+
+    def _deliver(self, operation: Operation):
+        """Applies an operation, or buffers it until the element it depends on exists."""
+        ready = [operation]
+        while ready:
+            operation = ready.pop()
+            dependency = operation.id if operation.kind == "delete" else operation.ref
+            if dependency is not None and dependency not in self._elements:
+                self._waiting.setdefault(dependency, []).append(operation)
+            elif operation.kind != "delete":
+                if operation.id not in self._elements:
+                    self._integrate_insert(operation)
+                    if operation.kind == "revive":
+                        self._revived[operation.ref] = operation.id
+                    ready.extend(self._waiting.pop(operation.id, ()))
+            else:
+                self._integrate_delete(operation.id)
+
+    def _integrate_insert(self, operation: Operation):
+        if operation.ref is None:
+            block_index, index = 0, 0
+        else:
+            ref = self._elements[operation.ref]
+            block_index = self._blocks.index(ref.block)
+            index = ref.block.elements.index(ref) + 1
+
+        # Skip the elements inserted concurrently after the same reference with a
+        # greater id, along with everything inserted after them.
+        while True:
+            block = self._blocks[block_index]
+            if index == len(block.elements):
+                if block_index + 1 == len(self._blocks):
+                    break
+                block_index, index = block_index + 1, 0
+                continue
+            if block.elements[index].id < operation.id:
+                break
+            index += 1
+
+        element = _Element(operation.id, operation.char, block)
+        block.elements.insert(index, element)
+        block.visible += 1
+        self._elements[operation.id] = element
+
+        if len(block.elements) > 2 * _BLOCK_SIZE:
+            tail = _Block(block.elements[_BLOCK_SIZE:])
+            del block.elements[_BLOCK_SIZE:]
+            block.visible -= tail.visible
+            for moved in tail.elements:
+                moved.block = tail
+            self._blocks.insert(block_index + 1, tail)
+
+    def _integrate_delete(self, element_id: ElementId):
+        element = self._elements[element_id]
+        if not element.deleted:
+            element.deleted = True
+            element.block.visible -= 1
+
+    # --------------------------------------------------------------------------
+    # Local Operations
+    # --------------------------------------------------------------------------
+
+    def _visible_elements(self, start: int, count: int) -> tp.List[_Element]:
+        """Returns up to `count` visible elements starting at the visible offset start."""
+        found: tp.List[_Element] = []
+        for block in self._blocks:
+            if len(found) == count:
+                break
+            if start >= block.visible:
+                start -= block.visible
+                continue
+            for element in block.elements:
+                if element.deleted:
+                    continue
+                if start:
+                    start -= 1
+                elif len(found) < count:
+                    found.append(element)
+                else:
+                    break
+        return found
+
+    def _local(self, operation: Operation) -> Operation:
+        self._deliver(operation)
+        self._outgoing.append(operation)
+        return operation
+
+    def _next_id(self) -> ElementId:
+        self._clock += 1
+        return self._clock, self.site_id
+
+    def _resolve(self, element_id: ElementId) -> _Element:
+        """Returns the element, or the one that most recently revived it."""
+        while element_id in self._revived:
+            element_id = self._revived[element_id]
+        return self._elements[element_id]
+
+    def _insert_after(self, ref: tp.Optional[ElementId], text: str) -> tp.List[Operation]:
+        operations = []
+        for char in text:
+            operations.append(self._local(Operation("insert", self._next_id(), ref, char)))
+            ref = operations[-1].id
+        return operations
+
+    def _insert(self, position: int, text: str) -> tp.List[Operation]:
+        position = max(0, min(int(position), len(self)))
+        ref = self._visible_elements(position - 1, 1)[0].id if position else None
+        return self._insert_after(ref, text)
+
+    def _delete(self, start: int, end: int) -> tp.List[Operation]:
+        start = max(0, int(start))
+        return [self._local(Operation("delete", element.id))
+                for element in self._visible_elements(start, max(0, int(end) - start))]
+
+    def _invert(self, operations: tp.List[Operation]) -> tp.List[Operation]:
+        """
+        Applies and returns operations that revert the given local ones: inserted
+        characters are deleted, and deleted ones are revived. A tombstone stays a
+        tombstone, so reviving inserts a copy right after it under a new id.
+        """
+        inverse: tp.List[Operation] = []
+        for operation in operations:
+            element = self._resolve(operation.id)
+            if operation.kind != "delete":
+                if not element.deleted:
+                    inverse.append(self._local(Operation("delete", element.id)))
+            elif element.deleted:
+                inverse.append(self._local(Operation("revive", self._next_id(), element.id, element.char)))
+        return inverse
+
+class CollabSession:
+    """
+    One user's view of a CollabReplica. Each session has its own undo/redo
+    history, which only ever reverts that user's own changes, even after
+    other users' edits have been merged around them.
+    """
+
+    def __init__(self, replica: CollabReplica, user_id: str):
+        self.replica = replica
+        self.user_id = user_id
+        self._undo_stack: tp.List[tp.List[Operation]] = []
+        self._redo_stack: tp.List[tp.List[Operation]] = []
+
+    def get_text(self) -> str:
+        return self.replica.get_text()
+
+    def _record(self, operations: tp.List[Operation]):
+        if operations:
+            self._undo_stack.append(operations)
+            self._redo_stack.clear()
+
+    def insert(self, position: int, text: str):
+        """Inserts text at a visible offset (clamped to the document)."""
+        self._record(self.replica._insert(position, text))
+
+    def delete(self, start: int, end: int):
+        """Deletes the text between two visible offsets."""
+        self._record(self.replica._delete(start, end))
+
+    def undo(self) -> bool:
+        """Reverts this user's last change. Returns whether there was one."""
+        if not self._undo_stack:
+            return False
+        self._redo_stack.append(self.replica._invert(self._undo_stack.pop()))
+        return True
+
+    def redo(self) -> bool:
+        """Re-applies this user's last undone change. Returns whether there was one."""
+        if not self._redo_stack:
+            return False
+        self._undo_stack.append(self.replica._invert(self._redo_stack.pop()))
+        return True
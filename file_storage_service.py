@@ -0,0 +1,114 @@
+import asyncio
+import contextlib
+import typing as tp
+
+from file_storage_system_impl import FileStorageSystemImpl
+
+class FileStorageService:
+    """
+    An asyncio front end for FileStorageSystemImpl.
+
+    Calls into the storage system run on the event loop thread, so each one is
+    atomic: size, ownership and quota updates are serialized by the loop itself
+    and need no global lock. The slow part of an operation (writing or copying
+    file contents) runs in a worker thread while holding only that path's lock,
+    so operations on unrelated paths proceed concurrently.
+    """
+
+    def __init__(self, system: tp.Optional[FileStorageSystemImpl] = None, executor=None):
+        """
+        Initializes the service.
+        - self.system: The wrapped storage system.
+        - self._executor: Executor for content I/O (None uses the loop's default thread pool).
+        - self._path_locks: {file_path: [lock, holders_and_waiters]}, pruned when unused.
+        """
+        self.system = system if system is not None else FileStorageSystemImpl()
+        self._executor = executor
+        self._path_locks: tp.Dict[str, tp.List[tp.Any]] = {}
+
+    @contextlib.asynccontextmanager
+    async def _lock_path(self, file_path: str):
+        """Holds the lock for a single path; the table entry is dropped once nobody needs it."""
+        entry = self._path_locks.get(file_path)
+        if entry is None:
+            entry = self._path_locks[file_path] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._path_locks[file_path]
+
+    async def _run_io(self, func, *args):
+        """Runs a blocking content operation in the executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def add_user(self, user_id: str, capacity: int) -> str:
+        return self.system.add_user(user_id, capacity)
+
+    async def merge_users(self, target_user_id: str, source_user_id: str) -> str:
+        return self.system.merge_users(target_user_id, source_user_id)
+
+    async def get_file_size(self, file_path: str) -> str:
+        return self.system.get_file_size(file_path)
+
+    async def add_file(self, file_path: str, user_id: str, data: bytes) -> str:
+        """
+        Adds a file with contents for a user. The quota is charged on the loop
+        before the contents are written in a worker thread, and given back if the
+        write fails or the call is cancelled.
+        """
+        async with self._lock_path(file_path):
+            result = self.system.add_file_by_user(file_path, user_id, len(data))
+            if result == "":
+                return ""
+
+            # Created on the loop thread, so worker threads never race to create it.
+            self.system._ensure_storage_dir()
+            write = asyncio.ensure_future(self._run_io(self.system._write_backing, data))
+            try:
+                backing = await asyncio.shield(write)
+            except BaseException:
+                # Cancelling the call cannot stop the worker thread, so the rollback
+                # waits for the write to end and releases whatever it produced.
+                await self._wait_out(write)
+                if not write.cancelled() and write.exception() is None:
+                    self.system._discard_backing(write.result())
+                self.system.delete_file(file_path)
+                raise
+            # Stored on the loop thread, only if the file still exists.
+            self.system._store_contents(file_path, backing)
+            return result
+
+    @staticmethod
+    async def _wait_out(future: asyncio.Future):
+        """Waits until future is done, even if the waiting task is cancelled again meanwhile."""
+        while not future.done():
+            try:
+                await asyncio.wait([future])
+            except asyncio.CancelledError:
+                pass
+
+    async def read_file(self, file_path: str, offset: int = 0, length: tp.Optional[int] = None) -> tp.Optional[bytes]:
+        """
+        Returns a copy of the requested byte range, made in a worker thread.
+        """
+        async with self._lock_path(file_path):
+            view = self.system.read_file(file_path, offset, length)
+            if view is None:
+                return None
+
+            try:
+                return await self._run_io(bytes, view)
+            finally:
+                view.release()
+
+    async def delete_file(self, file_path: str) -> str:
+        """
+        Deletes a file once in-flight operations on the same path have finished.
+        """
+        async with self._lock_path(file_path):
+            return self.system.delete_file(file_path)
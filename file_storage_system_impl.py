@@ -1,14 +1,138 @@
+import bisect
+import contextlib
+import itertools
+import mmap
+import os
+import shutil
+import tempfile
+import typing as tp
+
+class _SortedList:
+    """
+    A sorted list of unique keys (paths, or ranking tuples) kept in buckets of about
+    _LOAD keys each, so adding or removing one key moves O(sqrt n) references at
+    worst instead of shifting a single list of every key. `maxes` holds the last
+    key of each bucket, which a bisection uses to find the bucket for a key in
+    O(log n). Iterating from the start yields the first N keys in O(N).
+    """
+    _LOAD = 1000
+
+    def __init__(self):
+        self.buckets: tp.List[tp.List[str]] = []
+        self.maxes: tp.List[str] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> tp.Iterator[str]:
+        return itertools.chain.from_iterable(self.buckets)
+
+    def add(self, path: str):
+        if not self.buckets:
+            self.buckets.append([path])
+            self.maxes.append(path)
+        else:
+            i = min(bisect.bisect_left(self.maxes, path), len(self.buckets) - 1)
+            bucket = self.buckets[i]
+            bisect.insort(bucket, path)
+            self.maxes[i] = bucket[-1]
+            if len(bucket) > 2 * self._LOAD:
+                self.buckets.insert(i + 1, bucket[self._LOAD:])
+                del bucket[self._LOAD:]
+                self.maxes.insert(i, bucket[-1])
+        self._len += 1
+
+    def update(self, paths: tp.Iterable[str]):
+        """
+        Adds many paths, merging them into the buckets they fall in. Only those buckets
+        are touched, so a batch of neighbouring paths costs about its own size.
+        """
+        paths = sorted(paths)
+        if not self.buckets:
+            self.buckets = [paths[i:i + self._LOAD] for i in range(0, len(paths), self._LOAD)]
+            self.maxes = [bucket[-1] for bucket in self.buckets]
+            self._len = len(paths)
+            return
+
+        start = 0
+        while start < len(paths):
+            i = min(bisect.bisect_left(self.maxes, paths[start]), len(self.buckets) - 1)
+            end = len(paths) if i == len(self.buckets) - 1 else bisect.bisect_left(paths, self.maxes[i], start)
+            # The bucket and its share of the batch are two sorted runs, which Timsort merges in linear time.
+            bucket = self.buckets[i]
+            bucket.extend(paths[start:end])
+            bucket.sort()
+            if len(bucket) > 2 * self._LOAD:
+                pieces = [bucket[j:j + self._LOAD] for j in range(0, len(bucket), self._LOAD)]
+                self.buckets[i:i + 1] = pieces
+                self.maxes[i:i + 1] = [piece[-1] for piece in pieces]
+            else:
+                self.maxes[i] = bucket[-1]
+            start = end
+        self._len += len(paths)
+
+    def remove(self, path: str):
+        i = bisect.bisect_left(self.maxes, path)
+        bucket = self.buckets[i]
+        del bucket[bisect.bisect_left(bucket, path)]
+        self._len -= 1
+        if bucket:
+            self.maxes[i] = bucket[-1]
+        else:
+            del self.buckets[i]
+            del self.maxes[i]
+
+    def pop_range(self, lo: str, hi: tp.Optional[str]) -> tp.List[str]:
+        """Removes and returns the paths in [lo, hi), where None for hi means no upper bound."""
+        removed = self.range(lo, hi)
+        if not removed:
+            return removed
+        first = bisect.bisect_left(self.maxes, lo)
+        last = len(self.buckets) if hi is None else min(bisect.bisect_left(self.maxes, hi) + 1, len(self.buckets))
+        kept = []
+        for i in range(first, last):
+            bucket = self.buckets[i]
+            start = bisect.bisect_left(bucket, lo)
+            end = len(bucket) if hi is None else bisect.bisect_left(bucket, hi)
+            del bucket[start:end]
+            if bucket:
+                kept.append(bucket)
+        self.buckets[first:last] = kept
+        self.maxes[first:last] = [bucket[-1] for bucket in kept]
+        self._len -= len(removed)
+        return removed
+
+    def range(self, lo: str, hi: tp.Optional[str]) -> tp.List[str]:
+        """Returns the paths in [lo, hi), where None for hi means no upper bound."""
+        found: tp.List[str] = []
+        for i in range(bisect.bisect_left(self.maxes, lo), len(self.buckets)):
+            bucket = self.buckets[i]
+            start = bisect.bisect_left(bucket, lo)
+            if hi is not None and bucket[-1] >= hi:
+                found.extend(bucket[start:bisect.bisect_left(bucket, hi)])
+                break
+            found.extend(bucket[start:])
+        return found
+
 class FileStorageSystemImpl:
     """
     An in-memory implementation of a simplified file storage system.
     """
 
-    def __init__(self):
+    def __init__(self, storage_dir: tp.Optional[str] = None):
         """
         Initializes the data structures for the file system.
         - self.files: Stores file paths and their sizes.
         - self.users: Stores user IDs and their remaining storage capacity.
         - self.file_ownership: Maps each file path to its owner's user ID.
+        - self.sorted_paths: All file paths in sorted order, a range index for prefix queries.
+          Paths are kept in buckets, so each add or delete costs O(sqrt n) at worst.
+        - self.user_files / self.user_usage: Per-user ledger of owned files and used bytes.
+        - self.file_rankings / self.usage_ranking: Each user's files as (-size, path), and
+          every user as (-used_bytes, user_id), in ranking order for the usage reports.
+        - self.contents: Maps file paths that carry contents to their memory-mapped backing file.
+        - self.storage_dir: Directory holding the backing files (a temporary one is created on first use).
         """
         # {file_path: size}
         self.files = {}
@@ -20,6 +144,24 @@ class FileStorageSystemImpl:
         # {file_path: user_id}
         self.file_ownership = {}
 
+        # Every path that starts with a given prefix forms one contiguous run in this index.
+        self.sorted_paths = _SortedList()
+
+        # {user_id: {file_path: size}} and {user_id: used_bytes}, kept in sync with the
+        # maps above so usage reports never have to scan every file.
+        self.user_files: tp.Dict[str, tp.Dict[str, int]] = {"admin": {}}
+        self.user_usage: tp.Dict[str, int] = {"admin": 0}
+        self.file_rankings: tp.Dict[str, _SortedList] = {"admin": _SortedList()}
+        self.usage_ranking = _SortedList()
+        self.usage_ranking.add((0, "admin"))
+
+        # {file_path: (backing_file_path, mmap or None for empty files)}
+        self.contents: tp.Dict[str, tp.Tuple[str, tp.Optional[mmap.mmap]]] = {}
+        self.storage_dir = storage_dir
+        # Whether storage_dir is a temporary directory this instance created (and removes on close).
+        self._owns_storage_dir = False
+        self._backing_ids = itertools.count()
+
     def add_file(self, file_path: str, file_size: int) -> str:
         """
         Creates a new file owned by the 'admin' user.
@@ -40,18 +182,31 @@ class FileStorageSystemImpl:
         if file_path not in self.files:
             return "false"
 
+        self.sorted_paths.remove(file_path)
+        size = self._remove_file(file_path)
+
+        return str(size)
+
+    def _remove_file(self, file_path: str) -> int:
+        """
+        Removes a file from every record except the range index and returns its size.
+        """
         size = self.files[file_path]
         owner = self.file_ownership[file_path]
 
         # Restore the capacity to the user who owned the file.
         if owner in self.users:
             self.users[owner] += size
+            del self.user_files[owner][file_path]
+            self.file_rankings[owner].remove((-size, file_path))
+            self._set_usage(owner, self.user_usage[owner] - size)
 
         # Remove the file from records
         del self.files[file_path]
         del self.file_ownership[file_path]
+        self._release_contents(file_path)
 
-        return str(size)
+        return size
 
     def get_file_size(self, file_path: str) -> str:
         """
@@ -66,9 +221,9 @@ class FileStorageSystemImpl:
         """
         Finds and ranks files matching a given prefix.
         """
-        # Filter files that start with the given prefix
+        # Look up the files that start with the given prefix in the range index
         candidates = {
-            path: size for path, size in self.files.items() if path.startswith(prefix)
+            path: self.files[path] for path in self.sorted_paths.range(*self._prefix_range(prefix))
         }
 
         # Sort the candidates. The key is a tuple:
@@ -91,6 +246,10 @@ class FileStorageSystemImpl:
             return "false"
         
         self.users[user_id] = int(capacity)
+        self.user_files[user_id] = {}
+        self.user_usage[user_id] = 0
+        self.file_rankings[user_id] = _SortedList()
+        self.usage_ranking.add((0, user_id))
         return "true"
 
     def add_file_by_user(self, file_path: str, user_id: str, file_size: int) -> str:
@@ -110,7 +269,11 @@ class FileStorageSystemImpl:
         # If all checks pass, add the file
         self.files[file_path] = size
         self.file_ownership[file_path] = user_id
+        self.sorted_paths.add(file_path)
         self.users[user_id] -= size
+        self.user_files[user_id][file_path] = size
+        self.file_rankings[user_id].add((-size, file_path))
+        self._set_usage(user_id, self.user_usage[user_id] + size)
 
         return str(self.users[user_id])
 
@@ -128,12 +291,221 @@ class FileStorageSystemImpl:
         self.users[target_user_id] += self.users[source_user_id]
 
         # Re-assign ownership of all source user's files to the target user.
-        # Iterate over a copy of the items to allow modification during the loop.
-        for path, owner in list(self.file_ownership.items()):
-            if owner == source_user_id:
-                self.file_ownership[path] = target_user_id
+        # The ledger lists the source's files, so there is no need to scan every file.
+        source_files = self.user_files.pop(source_user_id)
+        for path in source_files:
+            self.file_ownership[path] = target_user_id
+        self.user_files[target_user_id].update(source_files)
+        self.file_rankings[target_user_id].update(self.file_rankings.pop(source_user_id))
+        source_usage = self.user_usage.pop(source_user_id)
+        self.usage_ranking.remove((-source_usage, source_user_id))
+        self._set_usage(target_user_id, self.user_usage[target_user_id] + source_usage)
         
         # Delete the source user
         del self.users[source_user_id]
 
         return str(self.users[target_user_id])
+
+    def _set_usage(self, user_id: str, used: int):
+        """Updates a user's used bytes, moving them in the usage ranking."""
+        self.usage_ranking.remove((-self.user_usage[user_id], user_id))
+        self.usage_ranking.add((-used, user_id))
+        self.user_usage[user_id] = used
+
+    @staticmethod
+    def _prefix_range(prefix: str) -> tp.Tuple[str, tp.Optional[str]]:
+        """
+        Returns the [lo, hi) bounds of the paths that start with prefix, where None for
+        hi means there is no upper bound.
+        """
+        # The smallest string above every match is the prefix with its last character
+        # incremented (characters that cannot be incremented are dropped first).
+        upper = prefix.rstrip(chr(0x10FFFF))
+        if not upper:
+            return prefix, None
+        return prefix, upper[:-1] + chr(ord(upper[-1]) + 1)
+
+    # --------------------------------------------------------------------------
+    # Bulk Operations
+    # --------------------------------------------------------------------------
+
+    def add_files_bulk(self, user_id: str, files: tp.Iterable[tp.Tuple[str, int]]) -> str:
+        """
+        Adds many files for one user as a single all-or-nothing operation.
+        Returns "added_count, remaining_capacity", or "" if any file is rejected.
+        """
+        if user_id not in self.users:
+            return ""
+
+        batch: tp.Dict[str, int] = {}
+        for file_path, file_size in files:
+            if file_path in self.files or file_path in batch:
+                return ""
+            batch[file_path] = int(file_size)
+
+        # The quota is checked once for the whole batch.
+        total_size = sum(batch.values())
+        if total_size > self.users[user_id]:
+            return ""
+
+        self.files.update(batch)
+        self.file_ownership.update(dict.fromkeys(batch, user_id))
+        self.users[user_id] -= total_size
+        self.user_files[user_id].update(batch)
+        self.file_rankings[user_id].update((-size, file_path) for file_path, size in batch.items())
+        self._set_usage(user_id, self.user_usage[user_id] + total_size)
+
+        self.sorted_paths.update(batch)
+
+        return f"{len(batch)}, {self.users[user_id]}"
+
+    def delete_by_prefix(self, prefix: str) -> str:
+        """
+        Deletes every file whose path starts with prefix, restoring each owner's capacity.
+        Returns "deleted_count, freed_bytes".
+        """
+        doomed = self.sorted_paths.pop_range(*self._prefix_range(prefix))
+
+        freed = sum(self._remove_file(file_path) for file_path in doomed)
+        return f"{len(doomed)}, {freed}"
+
+    # --------------------------------------------------------------------------
+    # Usage Reports
+    # --------------------------------------------------------------------------
+
+    def get_user_usage(self, user_id: str) -> str:
+        """
+        Returns a user's used bytes and file count as "used, count".
+        """
+        if user_id not in self.users:
+            return ""
+
+        return f"{self.user_usage[user_id]}, {len(self.user_files[user_id])}"
+
+    def get_n_largest_files_by_user(self, user_id: str, count: int) -> str:
+        """
+        Ranks a user's files by size (descending), then path (ascending), reading the
+        first count entries of the user's ranking in O(count).
+        """
+        if user_id not in self.users:
+            return ""
+
+        top_items = itertools.islice(self.file_rankings[user_id], max(int(count), 0))
+        return ", ".join(f"{path}({-negative_size})" for negative_size, path in top_items)
+
+    def get_n_users_by_usage(self, count: int) -> str:
+        """
+        Ranks users by used bytes (descending), then user ID (ascending), reading the
+        first count entries of the usage ranking in O(count).
+        """
+        top_items = itertools.islice(self.usage_ranking, max(int(count), 0))
+        return ", ".join(f"{user_id}({-negative_used})" for negative_used, user_id in top_items)
+
+    # --------------------------------------------------------------------------
+    # File Contents: Memory-Mapped Reads
+    # --------------------------------------------------------------------------
+
+    def add_file_with_contents(self, file_path: str, user_id: str, data: bytes) -> str:
+        """
+        Adds a file with contents on behalf of a user. The size charged against
+        the user's capacity is the length of the data, and given back if the write fails.
+        """
+        result = self.add_file_by_user(file_path, user_id, len(data))
+        if result == "":
+            return ""
+
+        try:
+            self._write_contents(file_path, data)
+        except BaseException:
+            self.delete_file(file_path)
+            raise
+        return result
+
+    def read_file(self, file_path: str, offset: int = 0, length: tp.Optional[int] = None) -> tp.Optional[memoryview]:
+        """
+        Returns a zero-copy view of `length` bytes starting at `offset`.
+        Returns None if the file has no contents or the range is out of bounds.
+        """
+        if file_path not in self.contents:
+            return None
+
+        # The size map is the source of truth for bounds checking.
+        size = self.files[file_path]
+        offset = int(offset)
+        length = size - offset if length is None else int(length)
+        if offset < 0 or length < 0 or offset + length > size:
+            return None
+
+        _, mapping = self.contents[file_path]
+        if mapping is None:  # Empty files cannot be memory-mapped
+            return memoryview(b"")
+        return memoryview(mapping)[offset:offset + length]
+
+    def close(self):
+        """Releases every memory mapping and removes the backing files."""
+        for file_path in list(self.contents):
+            self._release_contents(file_path)
+        if self._owns_storage_dir:
+            shutil.rmtree(self.storage_dir, ignore_errors=True)
+            self.storage_dir = None
+            self._owns_storage_dir = False
+
+    def _write_contents(self, file_path: str, data: bytes):
+        """Writes the data to a fresh backing file and maps it read-only."""
+        self._store_contents(file_path, self._write_backing(data))
+
+    def _write_backing(self, data: bytes) -> tp.Tuple[str, tp.Optional[mmap.mmap]]:
+        """
+        Writes the data to a fresh backing file, maps it read-only and returns both.
+        It touches no shared state, so it can run in a worker thread.
+        """
+        # Backing files are named by a counter, since file paths may contain separators.
+        backing_path = os.path.join(self._ensure_storage_dir(), f"{next(self._backing_ids)}.bin")
+        try:
+            with open(backing_path, "wb") as backing_file:
+                backing_file.write(data)
+
+            mapping = None
+            if data:
+                with open(backing_path, "rb") as backing_file:
+                    mapping = mmap.mmap(backing_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(backing_path)
+            raise
+        return backing_path, mapping
+
+    def _store_contents(self, file_path: str, backing: tp.Tuple[str, tp.Optional[mmap.mmap]]):
+        """
+        Attaches a written backing file to its file, or releases it if the file was
+        deleted (or given other contents) while it was being written.
+        """
+        if file_path in self.files and file_path not in self.contents:
+            self.contents[file_path] = backing
+        else:
+            self._discard_backing(backing)
+
+    def _ensure_storage_dir(self) -> str:
+        """Returns the storage directory, creating a temporary one on first use."""
+        if self.storage_dir is None:
+            self.storage_dir = tempfile.mkdtemp(prefix="file_storage_")
+            self._owns_storage_dir = True
+        return self.storage_dir
+
+    def _release_contents(self, file_path: str):
+        """Unmaps and removes the backing file of a file, if it has one."""
+        entry = self.contents.pop(file_path, None)
+        if entry is not None:
+            self._discard_backing(entry)
+
+    @staticmethod
+    def _discard_backing(backing: tp.Tuple[str, tp.Optional[mmap.mmap]]):
+        """Unmaps and removes a backing file."""
+        backing_path, mapping = backing
+        if mapping is not None:
+            try:
+                mapping.close()
+            except BufferError:
+                # A reader still holds a view; the mapping is freed along with the last one.
+                pass
+        os.remove(backing_path)
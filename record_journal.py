@@ -0,0 +1,151 @@
+from abc import ABC, abstractmethod
+import os
+import pickle
+import struct
+import typing as tp
+import zlib
+
+_HEADER = struct.Struct("<4sQ")  # magic, state generation
+_RECORD = struct.Struct("<BII")  # kind, payload length, CRC-32 of the payload
+
+def encode_text(text: str) -> bytes:
+    # Lone surrogates are valid in a str, so they must survive a round trip too.
+    return text.encode("utf-8", "surrogatepass")
+
+def decode_text(data: bytes) -> str:
+    return data.decode("utf-8", "surrogatepass")
+
+class RecordJournal(ABC):
+    """
+    A crash-safe, append-only log of binary records, and the saved state it continues.
+
+    Every record is appended as soon as it happens. Every `state_interval` records,
+    the owner's full state is written to a compressed state file next to the journal
+    and the journal starts over, so recovery only replays at most that many records.
+
+    Each saved state has a generation number, which is also stamped on the journal
+    it starts. A journal left over from an older generation (a crash between
+    writing the state and resetting the journal) is already part of the state and
+    is ignored. A record torn by a crash fails its checksum, and the journal is cut
+    back to the last complete record.
+
+    Subclasses set MAGIC, which tells their journals apart, and decode their
+    records' payloads in _decode_payload.
+    """
+
+    MAGIC = b""
+
+    def __init__(self, path: str, state_path: str, state_interval: int, fsync: bool):
+        """
+        Opens the journal at path, with its state saved at state_path.
+        - state_interval: Records written between saved states.
+        - fsync: Also force every write to disk, surviving power loss and not only a
+          crash of the process (much slower).
+        """
+        self.path = path
+        self.state_path = state_path
+        self.state_interval = state_interval
+        self.fsync = fsync
+
+        self._file: tp.Optional[tp.BinaryIO] = None
+        self._generation = 0
+        # Records written since the state was last saved
+        self._pending = 0
+
+    def recover(self) -> tp.Tuple[tp.Optional[dict], tp.List[tp.Tuple[int, tp.Any]]]:
+        """
+        Reads the last saved state (None if there is none) and the (kind, value)
+        records written after it, then opens the journal for appending.
+        """
+        state = None
+        self._generation = 0
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "rb") as state_file:
+                self._generation, state = pickle.loads(zlib.decompress(state_file.read()))
+
+        records: tp.List[tp.Tuple[int, tp.Any]] = []
+        end = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as journal_file:
+                data = journal_file.read()
+            if len(data) >= _HEADER.size and _HEADER.unpack_from(data) == (self.MAGIC, self._generation):
+                end = self._parse(data, records)
+
+        if end:
+            self._file = open(self.path, "r+b")
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._start_journal()
+        self._pending = len(records)
+        return state, records
+
+    def _parse(self, data: bytes, records: tp.List[tp.Tuple[int, tp.Any]]) -> int:
+        """Appends the complete records in data to records and returns where they end."""
+        offset = _HEADER.size
+        while offset + _RECORD.size <= len(data):
+            kind, length, checksum = _RECORD.unpack_from(data, offset)
+            start = offset + _RECORD.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break  # A torn write at the tail
+            records.append((kind, self._decode_payload(kind, payload)))
+            offset = start + length
+        return offset
+
+    @abstractmethod
+    def _decode_payload(self, kind: int, payload: bytes) -> tp.Any:
+        """Returns the value a record of the given kind was written for."""
+
+    def _start_journal(self):
+        """Replaces the journal with an empty one for the current generation."""
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, "wb")
+        self._file.write(_HEADER.pack(self.MAGIC, self._generation))
+        self._flush()
+
+    def _flush(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    @staticmethod
+    def _record(kind: int, payload: bytes) -> bytes:
+        return _RECORD.pack(kind, len(payload), zlib.crc32(payload)) + payload
+
+    def _append(self, kind: int, payload: bytes = b""):
+        self._file.write(self._record(kind, payload))
+        self._flush()
+        self._pending += 1
+
+    def _append_many(self, records: tp.Sequence[tp.Tuple[int, bytes]]):
+        """Appends many (kind, payload) records with a single write."""
+        self._file.write(b"".join(self._record(kind, payload) for kind, payload in records))
+        self._flush()
+        self._pending += len(records)
+
+    def _state_due(self) -> bool:
+        """Returns whether enough records were written since the state was last saved."""
+        return self._pending >= self.state_interval
+
+    def _save_state(self, state: dict):
+        """Saves the owner's state and starts a new, empty journal."""
+        generation = self._generation + 1
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "wb") as state_file:
+            state_file.write(zlib.compress(pickle.dumps((generation, state), pickle.HIGHEST_PROTOCOL)))
+            if self.fsync:
+                state_file.flush()
+                os.fsync(state_file.fileno())
+        os.replace(temp_path, self.state_path)
+
+        self._generation = generation
+        self._start_journal()
+        self._pending = 0
+
+    def close(self):
+        """Closes the journal file. The journal can be recovered again later."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,276 @@
+import random
+import typing as tp
+
+# Text is stored in chunks of at most this many characters. Short insertions are
+# folded into a neighbouring short chunk so typing does not create one node per key.
+# Large chunks keep full materialization close to a plain string copy, while
+# copying one chunk per edit stays cheap.
+CHUNK_SIZE = 8192
+
+class _Node:
+    """
+    A treap node holding one chunk of text. Nodes are never modified once a rope
+    references them, so ropes can share subtrees freely.
+
+    Each node also counts the newlines in its chunk and subtree, which makes the
+    tree a line index that every edit keeps up to date.
+    """
+
+    __slots__ = ("left", "right", "chunk", "priority", "size", "chunk_newlines", "newlines")
+
+    def __init__(self, left: tp.Optional["_Node"], chunk: str, right: tp.Optional["_Node"], priority: float,
+                 chunk_newlines: tp.Optional[int] = None):
+        self.left = left
+        self.right = right
+        self.chunk = chunk
+        self.priority = priority
+        self.chunk_newlines = chunk.count("\n") if chunk_newlines is None else chunk_newlines
+        self.size = len(chunk) + _size(left) + _size(right)
+        self.newlines = self.chunk_newlines + _newlines(left) + _newlines(right)
+
+
+def _size(node: tp.Optional[_Node]) -> int:
+    return node.size if node is not None else 0
+
+
+def _newlines(node: tp.Optional[_Node]) -> int:
+    return node.newlines if node is not None else 0
+
+
+def _copy(node: _Node, left: tp.Optional[_Node], right: tp.Optional[_Node]) -> _Node:
+    """Returns a node with the same chunk and priority but new children."""
+    return _Node(left, node.chunk, right, node.priority, node.chunk_newlines)
+
+
+def _build(text: str) -> tp.Optional[_Node]:
+    """
+    Builds a treap over the chunks of text in O(len(text)), using the stack-based
+    Cartesian tree construction.
+    """
+    stack: tp.List[_Node] = []
+    for i in range(0, len(text), CHUNK_SIZE):
+        node = _Node(None, text[i:i + CHUNK_SIZE], None, random.random())
+        last = None
+        while stack and stack[-1].priority < node.priority:
+            last = stack.pop()
+        node.left = last
+        if stack:
+            stack[-1].right = node
+        stack.append(node)
+
+    if not stack:
+        return None
+
+    # Sizes were computed before the children were linked; fix them bottom-up.
+    order = [stack[0]]
+    for node in order:
+        order.extend(child for child in (node.left, node.right) if child is not None)
+    for node in reversed(order):
+        node.size = len(node.chunk) + _size(node.left) + _size(node.right)
+        node.newlines = node.chunk_newlines + _newlines(node.left) + _newlines(node.right)
+    return stack[0]
+
+
+def _cut(node: tp.Optional[_Node], k: int) -> tp.Tuple[tp.Optional[_Node], tp.Optional[_Node], str, str]:
+    """
+    Splits a tree into the chunks before and after offset k, copying only one path.
+    If k falls inside a chunk, that chunk is left out of both trees and returned
+    as its head and tail strings.
+    """
+    if node is None:
+        return None, None, "", ""
+
+    left_size = _size(node.left)
+    if k <= left_size:
+        left, right, head, tail = _cut(node.left, k)
+        return left, _copy(node, right, node.right), head, tail
+
+    k -= left_size
+    if k >= len(node.chunk):
+        left, right, head, tail = _cut(node.right, k - len(node.chunk))
+        return _copy(node, node.left, left), right, head, tail
+
+    return node.left, node.right, node.chunk[:k], node.chunk[k:]
+
+
+def _split(node: tp.Optional[_Node], k: int) -> tp.Tuple[tp.Optional[_Node], tp.Optional[_Node]]:
+    """Splits a tree into its first k characters and the rest."""
+    left, right, head, tail = _cut(node, k)
+    # The halves of a cut chunk go back in as new nodes with fresh priorities. Reusing
+    # the old node's priority would let ties pile up until the treap degenerates.
+    if head:
+        left = _merge(left, _Node(None, head, None, random.random()))
+    if tail:
+        right = _merge(_Node(None, tail, None, random.random()), right)
+    return left, right
+
+
+def _merge(a: tp.Optional[_Node], b: tp.Optional[_Node]) -> tp.Optional[_Node]:
+    """Concatenates two trees, keeping the heap order on priorities."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.priority > b.priority:
+        return _copy(a, a.left, _merge(a.right, b))
+    return _copy(b, _merge(a, b.left), b.right)
+
+
+def _last_chunk(node: _Node) -> str:
+    while node.right is not None:
+        node = node.right
+    return node.chunk
+
+
+def _extend_last(node: _Node, text: str) -> _Node:
+    """Returns a copy of the tree with text appended to its last chunk."""
+    if node.right is None:
+        return _Node(node.left, node.chunk + text, None, node.priority, node.chunk_newlines + text.count("\n"))
+    return _copy(node, node.left, _extend_last(node.right, text))
+
+
+def _collect(node: tp.Optional[_Node], start: int, end: int, out: tp.List[str]):
+    """Appends the chunk pieces covering [start, end) of the tree to out."""
+    if node is None or start >= end:
+        return
+
+    left_size = _size(node.left)
+    if start < left_size:
+        _collect(node.left, start, min(end, left_size), out)
+
+    chunk_end = left_size + len(node.chunk)
+    if start < chunk_end and end > left_size:
+        out.append(node.chunk[max(start - left_size, 0):min(end, chunk_end) - left_size])
+
+    if end > chunk_end:
+        _collect(node.right, max(start - chunk_end, 0), end - chunk_end, out)
+
+
+def _count_newlines(node: tp.Optional[_Node], end: int) -> int:
+    """Counts the newlines among the first `end` characters of the tree."""
+    count = 0
+    while node is not None and end > 0:
+        left_size = _size(node.left)
+        if end <= left_size:
+            node = node.left
+            continue
+        count += _newlines(node.left)
+        end -= left_size
+        if end <= len(node.chunk):
+            return count + node.chunk.count("\n", 0, end)
+        count += node.chunk_newlines
+        end -= len(node.chunk)
+        node = node.right
+    return count
+
+
+def _find_newline(node: tp.Optional[_Node], index: int) -> int:
+    """Returns the offset of the newline with the given 0-based index, or -1."""
+    offset = 0
+    while node is not None:
+        left_newlines = _newlines(node.left)
+        if index < left_newlines:
+            node = node.left
+            continue
+        index -= left_newlines
+        offset += _size(node.left)
+        if index < node.chunk_newlines:
+            position = -1
+            for _ in range(index + 1):
+                position = node.chunk.find("\n", position + 1)
+            return offset + position
+        index -= node.chunk_newlines
+        offset += len(node.chunk)
+        node = node.right
+    return -1
+
+
+class Rope:
+    """
+    An immutable text buffer backed by a treap of text chunks.
+
+    Slicing and concatenation cost O(log n) and share structure with the
+    original, so `rope[:i] + text + rope[j:]` edits a document without copying
+    it and every intermediate rope stays valid. The full string is only built
+    when str() is called. It is deliberately not cached on the rope, because
+    old ropes kept as history snapshots would each pin a full copy of the text.
+    """
+
+    __slots__ = ("_root",)
+
+    def __init__(self, text: str = ""):
+        self._root = _build(text)
+
+    @classmethod
+    def _from_root(cls, root: tp.Optional[_Node]) -> "Rope":
+        rope = cls.__new__(cls)
+        rope._root = root
+        return rope
+
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def __str__(self) -> str:
+        return self.substring(0, len(self))
+
+    def __repr__(self) -> str:
+        return f"Rope({str(self)!r})"
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Rope):
+            other = str(other)
+        if not isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and str(self) == other
+
+    def __getitem__(self, key: tp.Union[int, slice]) -> tp.Union[str, "Rope"]:
+        """Indexing returns a character; slicing returns a Rope, with str slicing semantics."""
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("Rope slices do not support a step")
+            if stop <= start:
+                return Rope()
+            _, right = _split(self._root, start)
+            middle, _ = _split(right, stop - start)
+            return Rope._from_root(middle)
+
+        index = key + len(self) if key < 0 else key
+        if not 0 <= index < len(self):
+            raise IndexError("Rope index out of range")
+        return self.substring(index, index + 1)
+
+    def __add__(self, other: tp.Union[str, "Rope"]) -> "Rope":
+        if isinstance(other, str):
+            if not other:
+                return self
+            if self._root is not None and len(_last_chunk(self._root)) + len(other) <= CHUNK_SIZE:
+                return Rope._from_root(_extend_last(self._root, other))
+            other = Rope(other)
+        if not isinstance(other, Rope):
+            return NotImplemented
+        return Rope._from_root(_merge(self._root, other._root))
+
+    def __radd__(self, other: str) -> "Rope":
+        if not isinstance(other, str):
+            return NotImplemented
+        return Rope(other) + self
+
+    def count_newlines(self, end: tp.Optional[int] = None) -> int:
+        """Returns the number of newlines before offset end (in the whole rope by default)."""
+        if end is None:
+            return _newlines(self._root)
+        return _count_newlines(self._root, end)
+
+    def find_newline(self, index: int) -> int:
+        """Returns the offset of the newline with the given 0-based index, or -1 if there is none."""
+        if index < 0:
+            return -1
+        return _find_newline(self._root, index)
+
+    def substring(self, start: int, end: int) -> str:
+        """Returns the text between start and end, with str slicing semantics."""
+        start, end, _ = slice(start, end).indices(len(self))
+        pieces: tp.List[str] = []
+        _collect(self._root, start, end, pieces)
+        return "".join(pieces)
@@ -401,6 +401,451 @@ class FileStorageSystemTests(unittest.TestCase):
         self.assertEqual(self.file_system.merge_users("non_existent", "userA"), "", "Should fail if target user does not exist.")
         self.assertEqual(self.file_system.merge_users("userA", "userA"), "", "Should fail if source and target users are the same.")
 
+    # --------------------------------------------------------------------------
+    # Bulk Operations
+    # --------------------------------------------------------------------------
+
+    @timeout(0.4)
+    def test_bulk_add_files_is_all_or_nothing(self):
+        """Tests that a bulk import either adds every file or none of them."""
+        # Arrange
+        self.file_system.add_user("importer", 100)
+        self.file_system.add_file("/existing", 1)
+
+        # Act & Assert
+        self.assertEqual(self.file_system.add_files_bulk("importer", [("/t/a", 40), ("/t/b", 70)]), "", "Should fail when the batch exceeds capacity.")
+        self.assertEqual(self.file_system.add_files_bulk("importer", [("/t/a", 10), ("/existing", 10)]), "", "Should fail when a path already exists.")
+        self.assertEqual(self.file_system.add_files_bulk("importer", [("/t/a", 10), ("/t/a", 10)]), "", "Should fail on duplicate paths within the batch.")
+        self.assertEqual(self.file_system.get_file_size("/t/a"), "", "Failed imports should not add any file.")
+        self.assertEqual(self.file_system.add_files_bulk("importer", [("/t/b", 70), ("/t/a", 20)]), "2, 10")
+        self.assertEqual(self.file_system.get_n_files_by_prefix("/t/", 5), "/t/b(70), /t/a(20)")
+
+    @timeout(0.4)
+    def test_bulk_add_files_merges_into_a_large_index(self):
+        """Tests chunked imports landing between, before and after thousands of existing paths."""
+        # Arrange
+        self.file_system.add_user("u", 10**6)
+        self.file_system.add_files_bulk("u", [(f"/data/{i:05d}", 1) for i in range(0, 6000, 2)])
+
+        # Act
+        for chunk in range(3):
+            batch = [(f"/data/{i:05d}", 1) for i in range(1 + 2000 * chunk, 2000 * (chunk + 1), 2)]
+            self.assertEqual(self.file_system.add_files_bulk("u", batch)[:6], "1000, ")
+        self.file_system.add_files_bulk("u", [("/a", 2), ("/z", 3)])
+
+        # Assert
+        self.assertEqual(list(self.file_system.sorted_paths), ["/a"] + [f"/data/{i:05d}" for i in range(6000)] + ["/z"])
+        self.assertEqual(self.file_system.delete_by_prefix("/data/01"), "1000, 1000")
+        self.assertEqual(self.file_system.get_n_files_by_prefix("/", 2), "/z(3), /a(2)")
+
+    @timeout(0.4)
+    def test_delete_by_prefix_restores_capacity(self):
+        """Tests deleting a subtree by prefix and leaving neighbouring paths intact."""
+        # Arrange
+        self.file_system.add_user("u", 100)
+        self.file_system.add_files_bulk("u", [("/proj/a", 10), ("/proj/sub/b", 20), ("/proj2/c", 30)])
+        self.file_system.add_file("/proj/admin_file", 5)
+
+        # Act
+        result = self.file_system.delete_by_prefix("/proj/")
+
+        # Assert
+        self.assertEqual(result, "3, 35", "Should report the deleted count and freed bytes.")
+        self.assertEqual(self.file_system.get_n_files_by_prefix("/proj", 5), "/proj2/c(30)")
+        self.assertEqual(self.file_system.get_user_usage("u"), "30, 1")
+        self.assertEqual(self.file_system.add_file_by_user("/new", "u", 70), "0", "Deleted files should restore capacity.")
+        self.assertEqual(self.file_system.delete_by_prefix("/missing/"), "0, 0")
+
+    # --------------------------------------------------------------------------
+    # Usage Reports
+    # --------------------------------------------------------------------------
+
+    @timeout(0.4)
+    def test_usage_ledger_tracks_add_delete_and_merge(self):
+        """Tests that per-user usage follows additions, deletions and merges."""
+        # Arrange
+        self.file_system.add_user("alice", 1000)
+        self.file_system.add_user("bob", 1000)
+        self.file_system.add_file_by_user("/alice/a.txt", "alice", 300)
+        self.file_system.add_file_by_user("/alice/b.txt", "alice", 100)
+        self.file_system.add_file_by_user("/bob/c.txt", "bob", 250)
+
+        # Act & Assert
+        self.assertEqual(self.file_system.get_user_usage("alice"), "400, 2")
+        self.file_system.delete_file("/alice/b.txt")
+        self.assertEqual(self.file_system.get_user_usage("alice"), "300, 1", "Deleting a file should reduce usage.")
+        self.file_system.merge_users("alice", "bob")
+        self.assertEqual(self.file_system.get_user_usage("alice"), "550, 2", "Merging should move the source's usage to the target.")
+        self.assertEqual(self.file_system.get_user_usage("bob"), "", "The merged user should no longer have a ledger.")
+        self.assertEqual(self.file_system.delete_file("/bob/c.txt"), "250")
+        self.assertEqual(self.file_system.get_user_usage("alice"), "300, 1", "Merged files should be charged to the target.")
+
+    @timeout(0.4)
+    def test_usage_rankings_of_users_and_files(self):
+        """Tests the top users by usage and the largest files of a user."""
+        # Arrange
+        self.file_system.add_user("u1", 2000)
+        self.file_system.add_user("u2", 1000)
+        self.file_system.add_file_by_user("/u1/small", "u1", 10)
+        self.file_system.add_file_by_user("/u1/big_b", "u1", 500)
+        self.file_system.add_file_by_user("/u1/big_a", "u1", 500)
+        self.file_system.add_file_by_user("/u2/mid", "u2", 200)
+        self.file_system.add_file("/shared", 200)
+
+        # Act & Assert
+        self.assertEqual(self.file_system.get_n_users_by_usage(3), "u1(1010), admin(200), u2(200)")
+        self.assertEqual(self.file_system.get_n_largest_files_by_user("u1", 2), "/u1/big_a(500), /u1/big_b(500)")
+        self.assertEqual(self.file_system.get_n_largest_files_by_user("nobody", 2), "")
+
+    @timeout(0.4)
+    def test_usage_rankings_follow_deletes_bulk_adds_and_merges(self):
+        """Tests that both rankings stay current as files and users change."""
+        # Arrange
+        self.file_system.add_user("u1", 2000)
+        self.file_system.add_user("u2", 2000)
+        self.file_system.add_file_by_user("/u1/a", "u1", 300)
+        self.file_system.add_files_bulk("u2", [("/u2/b", 100), ("/u2/c", 400)])
+
+        # Act & Assert
+        self.assertEqual(self.file_system.get_n_users_by_usage(2), "u2(500), u1(300)")
+        self.file_system.delete_file("/u2/c")
+        self.assertEqual(self.file_system.get_n_users_by_usage(2), "u1(300), u2(100)")
+        self.file_system.merge_users("u2", "u1")
+        self.assertEqual(self.file_system.get_n_users_by_usage(5), "u2(400), admin(0)")
+        self.assertEqual(self.file_system.get_n_largest_files_by_user("u2", 5), "/u1/a(300), /u2/b(100)")
+        self.file_system.delete_by_prefix("/u1/")
+        self.assertEqual(self.file_system.get_n_largest_files_by_user("u2", 5), "/u2/b(100)")
+
+    # --------------------------------------------------------------------------
+    # File Contents: Memory-Mapped Reads
+    # --------------------------------------------------------------------------
+
+    @timeout(0.4)
+    def test_contents_read_file_returns_zero_copy_slices(self):
+        """Tests that read_file returns memoryview slices over the stored contents."""
+        # Arrange
+        self.addCleanup(self.file_system.close)
+        self.file_system.add_user("reader", 100)
+        self.assertEqual(self.file_system.add_file_with_contents("/logs/app.log", "reader", b"hello world"), "89", "Contents length should be charged to the user.")
+
+        # Act
+        view = self.file_system.read_file("/logs/app.log", 6, 5)
+
+        # Assert
+        self.assertIsInstance(view, memoryview)
+        self.assertEqual(bytes(view), b"world")
+        self.assertEqual(bytes(self.file_system.read_file("/logs/app.log")), b"hello world", "Default range should cover the whole file.")
+        view.release()
+
+    @timeout(0.4)
+    def test_contents_read_file_bounds_and_missing_files(self):
+        """Tests out-of-range reads, files without contents, and reads after deletion."""
+        # Arrange
+        self.addCleanup(self.file_system.close)
+        self.file_system.add_file_with_contents("/a.bin", "admin", b"0123456789")
+        self.file_system.add_file_with_contents("/empty.bin", "admin", b"")
+        self.file_system.add_file("/no_contents.bin", 10)
+
+        # Act & Assert
+        self.assertIsNone(self.file_system.read_file("/a.bin", 8, 5), "Reads past the end of the file should fail.")
+        self.assertIsNone(self.file_system.read_file("/a.bin", -1, 2), "Negative offsets should fail.")
+        self.assertEqual(bytes(self.file_system.read_file("/empty.bin")), b"", "Empty files should read as empty.")
+        self.assertIsNone(self.file_system.read_file("/no_contents.bin"), "Files without contents cannot be read.")
+        self.assertEqual(self.file_system.delete_file("/a.bin"), "10")
+        self.assertIsNone(self.file_system.read_file("/a.bin"), "Deleted files cannot be read.")
+
+    @timeout(0.4)
+    def test_contents_close_removes_temporary_storage_dir(self):
+        """Tests that close removes the temporary directory created for backing files."""
+        # Arrange
+        self.file_system.add_file_with_contents("/a.bin", "admin", b"data")
+        storage_dir = self.file_system.storage_dir
+
+        # Act
+        self.file_system.close()
+
+        # Assert
+        self.assertFalse(os.path.exists(storage_dir))
+
+    @timeout(0.4)
+    def test_contents_failed_write_gives_the_quota_back(self):
+        """Tests that a file whose contents cannot be written is not left charged to its owner."""
+        # Arrange
+        self.file_system.storage_dir = os.devnull  # Not a directory, so every write fails
+        self.file_system.add_user("u", 100)
+
+        # Act & Assert
+        with self.assertRaises(OSError):
+            self.file_system.add_file_with_contents("/a", "u", b"abc")
+        self.assertEqual(self.file_system.get_file_size("/a"), "")
+        self.assertEqual(self.file_system.get_user_usage("u"), "0, 0")
+        self.assertEqual(self.file_system.add_file_by_user("/a", "u", 100), "0", "The full capacity is available again.")
+
+import asyncio
+import threading
+from file_storage_service import FileStorageService
+
+
+class FileStorageServiceTests(unittest.TestCase):
+    """
+    Test suite for the asyncio FileStorageService front end.
+    """
+
+    failureException = Exception
+
+    def setUp(self):
+        """
+        Creates a new service around a clean file storage system for each test.
+        """
+        self.service = FileStorageService()
+        self.addCleanup(self.service.system.close)
+
+    @timeout(0.4)
+    def test_concurrent_operations_on_unrelated_paths(self):
+        """Tests concurrent writes and reads of different paths."""
+        async def scenario():
+            await self.service.add_user("u", 1000)
+            paths = [f"/data/{i}" for i in range(10)]
+            added = await asyncio.gather(*(self.service.add_file(path, "u", path.encode()) for path in paths))
+            read = await asyncio.gather(*(self.service.read_file(path) for path in paths))
+            return added, read, paths
+
+        # Act
+        added, read, paths = asyncio.run(scenario())
+
+        # Assert
+        self.assertNotIn("", added, "Every file fits within the quota.")
+        self.assertEqual(read, [path.encode() for path in paths])
+        self.assertEqual(self.service.system.get_user_usage("u"), f"{sum(len(path) for path in paths)}, 10")
+        self.assertEqual(self.service._path_locks, {}, "Unused path locks should be pruned.")
+
+    @timeout(0.4)
+    def test_quota_is_enforced_across_concurrent_writers(self):
+        """Tests that concurrent writers cannot overdraw a user's capacity."""
+        async def scenario():
+            await self.service.add_user("u", 25)
+            return await asyncio.gather(*(self.service.add_file(f"/f{i}", "u", b"0123456789") for i in range(5)))
+
+        # Act
+        results = asyncio.run(scenario())
+
+        # Assert
+        self.assertEqual(sorted(results), ["", "", "", "15", "5"], "Only two 10-byte files fit in 25 bytes.")
+
+    @timeout(0.4)
+    def test_same_path_operations_are_serialized(self):
+        """Tests that a read and a delete queued behind a write on the same path see its result."""
+        async def scenario():
+            return await asyncio.gather(
+                self.service.add_file("/same", "admin", b"payload"),
+                self.service.read_file("/same", 3, 4),
+                self.service.delete_file("/same"),
+                self.service.read_file("/same"),
+            )
+
+        # Act
+        results = asyncio.run(scenario())
+
+        # Assert
+        self.assertEqual(results, ["inf", b"load", "7", None])
+
+    @timeout(0.4)
+    def test_failed_write_gives_the_quota_back(self):
+        """Tests that a file whose contents cannot be written is not left charged to its owner."""
+        # Arrange
+        def failing_write(data):
+            raise OSError("disk full")
+        self.service.system._write_backing = failing_write
+
+        async def scenario():
+            await self.service.add_user("u", 100)
+            return await self.service.add_file("/f", "u", b"0123456789")
+
+        # Act & Assert
+        with self.assertRaises(OSError):
+            asyncio.run(scenario())
+        self.assertEqual(self.service.system.get_file_size("/f"), "")
+        self.assertEqual(self.service.system.get_user_usage("u"), "0, 0")
+        self.assertEqual(self.service.system.add_file_by_user("/f", "u", 100), "0", "The full capacity is available again.")
+
+    @timeout(0.4)
+    def test_cancelled_add_releases_the_finished_write(self):
+        """Tests that cancelling an add during its write rolls it back only once the write is done."""
+        # Arrange
+        system = self.service.system
+        started, release = threading.Event(), threading.Event()
+        real_write = system._write_backing
+
+        def slow_write(data):
+            started.set()
+            release.wait()
+            return real_write(data)
+        system._write_backing = slow_write
+
+        async def scenario():
+            await self.service.add_user("u", 100)
+            task = asyncio.create_task(self.service.add_file("/a", "u", b"abc"))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait)
+            task.cancel()
+            asyncio.get_running_loop().call_later(0.02, release.set)
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        # Act
+        asyncio.run(scenario())
+
+        # Assert
+        self.assertEqual(system.files, {})
+        self.assertEqual(system.contents, {})
+        self.assertEqual(os.listdir(system.storage_dir), [], "The finished write's backing file is removed.")
+        self.assertEqual(system.get_user_usage("u"), "0, 0")
+
+import tempfile
+from AOC07.size import analyze_transcripts, compute_dir_sizes, parse_transcript
+
+
+class DirectorySizeTests(unittest.TestCase):
+    """
+    Test suite for the AOC07 directory-size transcript analyzer.
+    """
+
+    failureException = Exception
+
+    def analyze(self, transcript):
+        return compute_dir_sizes(parse_transcript(transcript.splitlines()))
+
+    @timeout(0.4)
+    def test_cd_up_from_root_stays_at_root(self):
+        """Tests that `cd ..` at the root is a no-op."""
+        # Arrange
+        transcript = "$ cd /\n$ cd ..\n$ ls\n10 a.txt\ndir x\n$ cd x\n$ ls\n5 b.txt\n$ cd ..\n$ cd ..\n$ cd x\n"
+
+        # Act
+        sizes = self.analyze(transcript)
+
+        # Assert
+        self.assertEqual(sizes, {"/": 15, "/x": 5})
+
+    @timeout(0.4)
+    def test_directory_listed_twice_is_counted_once(self):
+        """Tests that listing a directory again does not count its files twice."""
+        # Arrange
+        transcript = "$ cd /\n$ ls\ndir d\n$ cd d\n$ ls\n100 f\n$ cd ..\n$ cd d\n$ ls\n100 f\n"
+
+        # Act
+        sizes = self.analyze(transcript)
+
+        # Assert
+        self.assertEqual(sizes, {"/": 100, "/d": 100})
+
+    @timeout(0.4)
+    def test_directory_never_listed_has_size_zero(self):
+        """Tests that directories seen only in a listing or a cd still get a size."""
+        # Arrange
+        transcript = "$ cd /\n$ ls\ndir seen\n7 top\n$ cd visited\n$ cd deeper\n"
+
+        # Act
+        sizes = self.analyze(transcript)
+
+        # Assert
+        self.assertEqual(sizes, {"/": 7, "/seen": 0, "/visited": 0, "/visited/deeper": 0})
+
+    @timeout(5)
+    def test_analyze_transcripts_in_parallel_matches_serial(self):
+        """Tests that a process pool gives the same result as analyzing one file at a time."""
+        # Arrange
+        transcript_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(transcript_dir.cleanup)
+        paths = []
+        for i in range(3):
+            paths.append(os.path.join(transcript_dir.name, f"{i}.txt"))
+            with open(paths[-1], "w") as transcript_file:
+                transcript_file.write(f"$ cd /\n$ ls\ndir a\n{i + 1} f\n$ cd a\n$ ls\n{10 * i} g\n")
+
+        # Act
+        parallel = analyze_transcripts(paths, processes=2)
+
+        # Assert
+        self.assertEqual(parallel, analyze_transcripts(paths))
+        self.assertEqual(parallel[paths[2]], {"/": 23, "/a": 20})
+
+from rope import Rope
+
+class RopeTests(unittest.TestCase):
+    """
+    Test suite for the Rope document buffer used by the text editor.
+    """
+
+    failureException = Exception
+
+    @timeout(0.4)
+    def test_edits_match_string_slicing(self):
+        """Tests that slice-and-concatenate edits behave exactly like str."""
+        # Arrange
+        text = "The quick brown fox jumps over the lazy dog. " * 50
+        rope = Rope(text)
+
+        # Act & Assert
+        for start, end in [(0, 0), (4, 10), (10, 4), (-5, 3), (100, 10**6)]:
+            text, rope = text[:start] + "<edit>" + text[end:], rope[:start] + "<edit>" + rope[end:]
+            self.assertEqual(str(rope), text)
+            self.assertEqual(len(rope), len(text))
+            self.assertEqual(rope.substring(start, end), text[start:end])
+
+    @timeout(0.4)
+    def test_edits_leave_earlier_versions_intact(self):
+        """Tests that ropes are immutable, so old versions remain valid snapshots."""
+        # Arrange
+        original = Rope("hello world")
+
+        # Act
+        edited = original[:5] + "," + original[5:]
+
+        # Assert
+        self.assertEqual(original, "hello world")
+        self.assertEqual(edited, "hello, world")
+        self.assertEqual(edited[-1], "d")
+
+    @timeout(0.4)
+    def test_cutting_chunks_keeps_heap_order(self):
+        """Tests that edits splitting chunks in two keep every node's priority above its children's."""
+        # Arrange
+        text = "".join(chr(ord("a") + i % 26) for i in range(100000))
+        rope = Rope(text)
+
+        # Act
+        for i in range(200):
+            start = (i * 7919) % len(text)
+            text, rope = text[:start] + "|" + text[start + 3:], rope[:start] + "|" + rope[start + 3:]
+
+        # Assert
+        self.assertEqual(str(rope), text)
+        stack = [rope._root]
+        while stack:
+            node = stack.pop()
+            for child in (node.left, node.right):
+                if child is not None:
+                    self.assertGreaterEqual(node.priority, child.priority)
+                    stack.append(child)
+
+    @timeout(0.4)
+    def test_newline_index(self):
+        """Tests counting and locating newlines across chunk boundaries and edits."""
+        # Arrange
+        text = "line\n" * 5000
+        rope = Rope(text)
+        rope = rope[:12] + "\n\n" + rope[12:]
+        text = text[:12] + "\n\n" + text[12:]
+
+        # Act & Assert
+        self.assertEqual(rope.count_newlines(), text.count("\n"))
+        for end in [0, 4, 5, 13, 14, 9000, len(text)]:
+            self.assertEqual(rope.count_newlines(end), text.count("\n", 0, end))
+        positions = [i for i, char in enumerate(text) if char == "\n"]
+        for index in [0, 2, 3, 1800, len(positions) - 1]:
+            self.assertEqual(rope.find_newline(index), positions[index])
+        self.assertEqual(rope.find_newline(len(positions)), -1)
+
 from text_editor_impl import TextEditorImpl
 
 class TextEditorTests(unittest.TestCase):
@@ -598,6 +1043,514 @@ class TextEditorTests(unittest.TestCase):
         final_state = self.editor.append("!")
         self.assertEqual(final_state, "Test text!", "Appending should happen at the end, proving selection was undone.")
 
+    # --------------------------------------------------------------------------
+    # Delta-Based History
+    # --------------------------------------------------------------------------
+
+    @timeout(0.4)
+    def test_history_limit_drops_oldest_operations(self):
+        """Tests that only the most recent history_limit operations can be undone."""
+        # Arrange
+        self.editor = TextEditorImpl(history_limit=2)
+
+        # Act
+        results = self.run_queries([
+            ["APPEND", "a"],
+            ["APPEND", "b"],
+            ["APPEND", "c"],
+            ["UNDO"],
+            ["UNDO"],
+            ["UNDO"],  # The first APPEND fell off the history
+            ["REDO"],
+        ])
+
+        # Assert
+        self.assertEqual(results, ["a", "ab", "abc", "ab", "a", "a", "ab"])
+
+    @timeout(0.4)
+    def test_undo_redo_of_reversed_selection_edits(self):
+        """Tests that edits over a reversed selection are inverted exactly."""
+        # Arrange
+        self.editor.append("abcdef")
+        self.editor.select(4, 2)
+
+        # Act & Assert
+        self.assertEqual(self.editor.append("X"), "abcdXcdef", "Should match doc[:start] + text + doc[end:].")
+        self.assertEqual(self.editor.undo(), "abcdef")
+        self.assertEqual(self.editor.redo(), "abcdXcdef")
+        self.assertEqual(self.editor.undo(), "abcdef")
+        self.assertEqual(self.editor.append("!"), "abcd!cdef", "Undo should restore the reversed selection too.")
+
+    # --------------------------------------------------------------------------
+    # Lazy Document Materialization
+    # --------------------------------------------------------------------------
+
+    @timeout(0.4)
+    def test_lazy_mode_returns_document_handles(self):
+        """Tests that lazy mode returns immutable handles that compare like strings."""
+        # Arrange
+        self.editor = TextEditorImpl(lazy=True)
+
+        # Act
+        first = self.editor.append("Hello")
+        second = self.editor.append(", World")
+        undone = self.editor.undo()
+
+        # Assert
+        self.assertIsInstance(first, Rope)
+        self.assertEqual(first, "Hello", "Earlier handles should not change after later edits.")
+        self.assertEqual(str(second), "Hello, World")
+        self.assertEqual(len(second), 12)
+        self.assertEqual(undone, "Hello")
+
+    @timeout(0.4)
+    def test_get_text_returns_windows_of_the_document(self):
+        """Tests windowed reads with get_text in both modes."""
+        for lazy in (False, True):
+            # Arrange
+            self.editor = TextEditorImpl(lazy=lazy)
+            self.editor.append("0123456789")
+
+            # Act & Assert
+            self.assertEqual(self.editor.get_text(2, 5), "234")
+            self.assertEqual(self.editor.get_text(7), "789")
+            self.assertEqual(self.editor.get_text(), "0123456789")
+
+    # --------------------------------------------------------------------------
+    # Operation Coalescing
+    # --------------------------------------------------------------------------
+
+    @timeout(0.4)
+    def test_coalescing_merges_bursts_of_typing(self):
+        """Tests that adjacent typing within the window becomes one undo step."""
+        # Arrange
+        now = [0.0]
+        self.editor = TextEditorImpl(coalesce_window=1.0, coalesce_limit=4, clock=lambda: now[0])
+
+        # Act
+        for key in "hello":  # The fifth key exceeds coalesce_limit
+            self.editor.append(key)
+        now[0] = 5.0  # A pause longer than the window
+        self.editor.append("!")
+
+        # Assert
+        self.assertEqual(self.editor.undo(), "hello")
+        self.assertEqual(self.editor.undo(), "hell")
+        self.assertEqual(self.editor.undo(), "")
+        self.assertEqual(self.editor.redo(), "hell")
+
+    @timeout(0.4)
+    def test_coalescing_merges_forward_deletes_but_not_other_edits(self):
+        """Tests that repeated deletes merge, while moves and non-adjacent edits do not."""
+        # Arrange
+        self.editor = TextEditorImpl(coalesce_window=1.0, clock=lambda: 0.0)
+        self.editor.append("abcdef")
+        self.editor.move(1)
+
+        # Act
+        self.editor.delete()
+        self.editor.delete()
+        self.editor.append("X")
+
+        # Assert
+        self.assertEqual(self.editor.undo(), "adef", "Typing after deleting is a separate step.")
+        self.assertEqual(self.editor.undo(), "abcdef", "Both deletes are undone together.")
+        self.assertEqual(self.editor.undo(), "abcdef", "The move is still its own step.")
+        self.assertEqual(self.editor.undo(), "")
+
+    # --------------------------------------------------------------------------
+    # Line and Column Positions
+    # --------------------------------------------------------------------------
+
+    @timeout(0.4)
+    def test_offsets_and_line_columns_round_trip(self):
+        """Tests conversion between offsets and 0-based (line, column) pairs."""
+        # Arrange
+        self.editor.append("first\nsecond\n\nlast")
+
+        # Act & Assert
+        for offset, linecol in [(0, (0, 0)), (5, (0, 5)), (6, (1, 0)), (13, (2, 0)), (14, (3, 0)), (18, (3, 4))]:
+            self.assertEqual(self.editor.offset_to_linecol(offset), linecol)
+            self.assertEqual(self.editor.linecol_to_offset(*linecol), offset)
+
+    @timeout(0.4)
+    def test_line_columns_are_clamped_and_follow_edits(self):
+        """Tests clamping of out-of-range positions and that the index tracks edits."""
+        # Arrange
+        self.editor.append("ab\ncd\nef")
+
+        # Act & Assert
+        self.assertEqual(self.editor.linecol_to_offset(0, 10), 2, "Columns clamp to the end of the line.")
+        self.assertEqual(self.editor.linecol_to_offset(9, 1), 7, "Lines clamp to the last line.")
+        self.assertEqual(self.editor.offset_to_linecol(100), (2, 2))
+
+        self.editor.move_to_line(1, 1)
+        self.assertEqual(self.editor.append("X\nY"), "ab\ncX\nYd\nef")
+        self.assertEqual(self.editor.offset_to_linecol(7), (2, 1), "The cursor after the insert.")
+        self.assertEqual(self.editor.linecol_to_offset(3, 0), 9)
+
+        self.editor.undo()
+        self.assertEqual(self.editor.offset_to_linecol(7), (2, 1), "The index follows undo.")
+        self.assertEqual(self.editor.offset_to_linecol(4), (1, 1))
+
+    # --------------------------------------------------------------------------
+    # Search and Replace
+    # --------------------------------------------------------------------------
+
+    @timeout(0.4)
+    def test_find_all_tracks_edits(self):
+        """Tests that cached search results stay correct as the document is edited."""
+        # Arrange
+        self.editor.append("banana band")
+        self.assertEqual(self.editor.find_all("ana"), [1, 3], "Overlapping occurrences are included.")
+
+        # Act & Assert
+        self.editor.move(0)
+        self.editor.append("an")
+        self.assertEqual(self.editor.find_all("ana"), [3, 5])
+        self.editor.select(6, 9)  # Joins "anbana" and "band" into "anbanband"
+        self.editor.delete()
+        self.assertEqual(self.editor.find_all("ana"), [3])
+        self.editor.undo()
+        self.assertEqual(self.editor.find_all("ana"), [3, 5])
+        self.assertEqual(self.editor.find_all("an"), [0, 3, 5, 10])
+        self.assertEqual(self.editor.find_all(""), [])
+
+    @timeout(0.4)
+    def test_replace_all_is_one_undoable_operation(self):
+        """Tests that replace_all matches str.replace and undoes in one step."""
+        # Arrange
+        self.editor.append("aaa-aaa-a")
+        self.editor.move(6)
+
+        # Act
+        result = self.editor.replace_all("aa", "b")
+
+        # Assert
+        self.assertEqual(result, "aaa-aaa-a".replace("aa", "b"))
+        self.assertEqual(self.editor.append("|"), "ba-b|a-a", "The cursor keeps its place in the text.")
+        self.editor.undo()
+        self.assertEqual(self.editor.undo(), "aaa-aaa-a")
+        self.assertEqual(self.editor.redo(), "ba-ba-a")
+        self.assertEqual(self.editor.replace_all("zz", "y"), "ba-ba-a", "No match is a no-op.")
+
+from text_editor_workspace import EditorWorkspace
+
+
+class EditorWorkspaceTests(unittest.TestCase):
+    """
+    Test suite for the multi-document EditorWorkspace.
+    """
+
+    failureException = Exception
+
+    def setUp(self):
+        """
+        Creates a workspace with a small history budget and its own spill directory.
+        """
+        spill_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spill_dir.cleanup)
+        self.spill_dir = spill_dir.name
+        self.workspace = EditorWorkspace(history_budget=1000, spill_dir=self.spill_dir)
+
+    @timeout(0.4)
+    def test_clipboard_is_shared_per_user(self):
+        """Tests that a user's documents share a clipboard that other users cannot see."""
+        # Arrange
+        first = self.workspace.open("alice", "doc1")
+        second = self.workspace.open("alice", "doc2")
+        other = self.workspace.open("bob", "doc1")
+        first.append("shared text")
+        first.select(0, 6)
+        first.cut()
+
+        # Act & Assert
+        self.assertEqual(second.paste(), "shared", "The same user's documents share a clipboard.")
+        self.assertEqual(other.paste(), "", "Other users have their own clipboard.")
+        self.assertIs(self.workspace.open("alice", "doc1"), first, "Reopening returns the same session.")
+
+    @timeout(0.4)
+    def test_cold_histories_are_spilled_and_reloaded(self):
+        """Tests that exceeding the budget spills cold histories, which reload on use."""
+        # Arrange
+        cold = self.workspace.open("alice", "cold")
+        cold.append("x" * 300)
+        cold.append("y" * 300)
+        hot = self.workspace.open("alice", "hot")
+
+        # Act
+        hot.append("z" * 300)
+
+        # Assert
+        self.assertEqual(cold.history_size(), 0, "The cold session's history should be spilled.")
+        self.assertEqual(len(os.listdir(self.spill_dir)), 1)
+        self.assertLessEqual(self.workspace.history_usage(), 1000)
+        self.assertEqual(cold.undo(), "x" * 300, "Undo should reload the spilled history.")
+        self.assertEqual(hot.history_size(), 0, "Reloading spills the now colder session.")
+        self.assertEqual(cold.redo(), "x" * 300 + "y" * 300)
+        self.assertEqual(len(os.listdir(self.spill_dir)), 1, "The spill file is removed once reloaded.")
+        self.assertEqual(hot.undo(), "")
+
+    @timeout(0.4)
+    def test_edits_stay_within_the_budget(self):
+        """Tests that a history growing through edits is spilled, and undo still reaches all of it."""
+        # Arrange
+        editor = self.workspace.open("alice", "doc")
+        other = self.workspace.open("bob", "doc")
+        other.append("b" * 100)
+
+        # Act
+        for _ in range(200):
+            editor.append("x" * 100)
+
+        # Assert
+        self.assertLessEqual(self.workspace.history_usage(), 1000)
+        self.assertEqual(self.workspace.history_usage(), editor.history_size() + other.history_size())
+        for _ in range(199):
+            editor.undo()
+        self.assertEqual(editor.undo(), "")
+        self.assertEqual(editor.redo(), "x" * 100)
+        self.assertEqual(other.undo(), "")
+        self.assertLessEqual(self.workspace.history_usage(), 1000)
+
+    @timeout(0.4)
+    def test_spilling_does_not_change_how_typing_is_coalesced(self):
+        """Tests that a burst of typing stays one undo step even if the history is spilled halfway."""
+        # Arrange
+        now = [0.0]
+        workspace = EditorWorkspace(history_budget=300, spill_dir=self.spill_dir, coalesce_window=1,
+                                    clock=lambda: now[0])
+        editor = workspace.open("alice", "doc")
+        editor.append("first ")
+        now[0] = 10.0
+        for char in "hello":
+            editor.append(char)
+        size_before_spill = editor.history_size()
+
+        # Act
+        workspace.open("bob", "doc").append("b" * 300)
+        for char in " world":
+            editor.append(char)
+
+        # Assert
+        self.assertLess(editor.history_size(), size_before_spill, "Alice's history should have been spilled.")
+        self.assertEqual(editor.undo(), "first ", "The whole burst is undone at once.")
+        self.assertEqual(editor.undo(), "")
+
+    @timeout(0.4)
+    def test_close_discards_sessions_and_spill_files(self):
+        """Tests closing sessions, including one whose history is on disk."""
+        # Arrange
+        self.workspace.open("alice", "doc").append("z" * 2000)
+        self.workspace.open("alice", "other")
+
+        # Act & Assert
+        self.assertTrue(self.workspace.close("alice", "doc"))
+        self.assertFalse(self.workspace.close("alice", "doc"), "Closing twice should fail.")
+        self.assertEqual(os.listdir(self.spill_dir), [])
+
+    @timeout(0.4)
+    def test_close_all_removes_the_temporary_spill_dir(self):
+        """Tests that close_all ends every session and removes the spill directory the workspace created."""
+        # Arrange
+        workspace = EditorWorkspace(history_budget=100)
+        workspace.open("alice", "doc").append("x" * 200)
+        workspace.open("bob", "doc").append("y" * 200)
+        spill_dir = workspace.spill_dir
+
+        # Act
+        workspace.close_all()
+
+        # Assert
+        self.assertFalse(os.path.exists(spill_dir))
+        self.assertEqual(workspace.history_usage(), 0)
+        self.assertFalse(workspace.close("alice", "doc"), "Every session should be closed.")
+
+class JournalFixture:
+    """
+    The setUp and reopen shared by the tests recovering an object from its journal.
+    Subclasses set journal_file and journal_class, and define journal_of and
+    recover_from for the object they test.
+    """
+
+    journal_file = "test.journal"
+    journal_class = None
+
+    def setUp(self):
+        """Creates a temporary directory for the journal and its saved state."""
+        journal_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(journal_dir.cleanup)
+        self.path = os.path.join(journal_dir.name, self.journal_file)
+
+    def reopen(self, owner):
+        """Simulates a crash: abandons the object and recovers a new one from its journal."""
+        self.journal_of(owner).close()
+        journal = self.journal_class(self.path)
+        self.addCleanup(journal.close)
+        return self.recover_from(journal)
+
+from text_editor_journal import EditorJournal
+
+class EditorJournalTests(JournalFixture, unittest.TestCase):
+    """
+    Test suite for crash recovery of TextEditorImpl from an EditorJournal.
+    """
+
+    failureException = Exception
+    journal_file = "doc.journal"
+    journal_class = EditorJournal
+
+    @staticmethod
+    def journal_of(editor):
+        return editor._journal
+
+    @staticmethod
+    def recover_from(journal):
+        return TextEditorImpl(journal=journal)
+
+    @timeout(0.4)
+    def test_recovers_text_cursor_clipboard_and_history(self):
+        """Tests that every part of the editor state survives a restart."""
+        # Arrange
+        editor = TextEditorImpl(journal=EditorJournal(self.path))
+        editor.append("Hello, world")
+        editor.select(5, 12)
+        editor.cut()
+        editor.append("!")
+        editor.undo()
+
+        # Act
+        recovered = self.reopen(editor)
+
+        # Assert
+        self.assertEqual(recovered.get_text(), "Hello")
+        self.assertEqual(recovered.redo(), "Hello!")
+        self.assertEqual(recovered.paste(), "Hello!, world", "The cursor and clipboard are restored.")
+        recovered.undo()
+        recovered.undo()
+        self.assertEqual(recovered.undo(), "Hello, world")
+
+    @timeout(0.4)
+    def test_recovers_from_checkpoint_and_torn_tail(self):
+        """Tests replay on top of a checkpoint, ignoring a record cut short by a crash."""
+        # Arrange
+        editor = TextEditorImpl(journal=EditorJournal(self.path, checkpoint_interval=4))
+        for word in ["one ", "two ", "three ", "four ", "five ", "six"]:
+            editor.append(word)
+
+        # Act
+        editor._journal.close()
+        with open(self.path, "r+b") as journal_file:
+            journal_file.truncate(os.path.getsize(self.path) - 1)
+        recovered = self.reopen(editor)
+
+        # Assert
+        self.assertTrue(os.path.exists(self.path + ".checkpoint"))
+        self.assertEqual(recovered.get_text(), "one two three four five ")
+        self.assertEqual(recovered.append("seven"), "one two three four five seven")
+        self.assertEqual(self.reopen(recovered).undo(), "one two three four five ")
+
+import json
+from collab_editor import CollabReplica
+
+class CollabEditorTests(unittest.TestCase):
+    """
+    Test suite for the collaborative editing replicas, using in-process peers.
+    """
+
+    failureException = Exception
+
+    def setUp(self):
+        """Creates two replicas of the same document."""
+        self.left = CollabReplica("left")
+        self.right = CollabReplica("right")
+
+    def sync(self):
+        """Delivers each replica's outgoing operations to the other."""
+        to_right, to_left = self.left.take_outgoing(), self.right.take_outgoing()
+        self.right.receive(to_right)
+        self.left.receive(to_left)
+
+    @timeout(0.4)
+    def test_concurrent_edits_converge(self):
+        """Tests that concurrent inserts and deletes merge to the same text everywhere."""
+        # Arrange
+        self.left.session("alice").insert(0, "hello")
+        self.sync()
+
+        # Act
+        self.left.session("alice").insert(5, " world")
+        self.right.session("bob").insert(5, " there")
+        self.right.session("bob").delete(0, 1)
+        self.sync()
+
+        # Assert
+        self.assertEqual(self.left.get_text(), self.right.get_text())
+        self.assertEqual(self.left.get_text(), "ello there world", "Ties are broken the same way on every replica.")
+
+    @timeout(0.4)
+    def test_out_of_order_and_duplicate_operations_are_buffered(self):
+        """Tests that operations wait for their dependencies and apply only once."""
+        # Arrange
+        session = self.left.session("alice")
+        session.insert(0, "abc")
+        session.delete(1, 2)
+        operations = self.left.take_outgoing()
+
+        # Act & Assert
+        self.right.receive(reversed(operations))
+        self.assertEqual(self.right.get_text(), "ac")
+        self.assertEqual(self.right.pending(), 0)
+        self.right.receive(operations)
+        self.assertEqual(self.right.get_text(), "ac", "Duplicates should be ignored.")
+
+        fresh = CollabReplica("fresh")
+        fresh.receive(operations[2:])
+        self.assertEqual((fresh.get_text(), fresh.pending()), ("", 2))
+        fresh.receive(operations[:2])
+        self.assertEqual(fresh.get_text(), "ac")
+
+    @timeout(0.4)
+    def test_receives_operations_deserialized_from_the_wire(self):
+        """Tests that plain field sequences, with ids as lists after a JSON round trip, are accepted."""
+        # Arrange
+        self.left.session("alice").insert(0, "hi")
+        wire = json.dumps(self.left.take_outgoing())
+
+        # Act
+        self.right.receive(json.loads(wire))
+        self.right.session("bob").insert(2, "!")
+        self.left.receive(self.right.take_outgoing())
+
+        # Assert
+        self.assertEqual(self.right.get_text(), "hi!")
+        self.assertEqual(self.left.get_text(), "hi!")
+
+    @timeout(0.4)
+    def test_undo_only_reverts_the_users_own_changes(self):
+        """Tests per-user undo/redo after other users' edits were merged in."""
+        # Arrange
+        alice, bob = self.left.session("alice"), self.right.session("bob")
+        alice.insert(0, "one three")
+        self.sync()
+        bob.insert(3, " two")
+        bob.delete(0, 4)  # Removes "one "
+        self.sync()
+
+        # Act & Assert
+        self.assertEqual(self.left.get_text(), "two three")
+        self.assertTrue(bob.undo())
+        self.sync()
+        self.assertEqual(self.left.get_text(), "one two three")
+
+        self.assertTrue(alice.undo())
+        self.sync()
+        self.assertEqual(self.right.get_text(), " two", "Bob's insert survives Alice's undo.")
+        self.assertTrue(alice.redo())
+        self.sync()
+        self.assertEqual(self.right.get_text(), "one two three")
+        self.assertFalse(alice.redo())
+
 from time_tracking_system_impl import TimeTrackingSystemImpl
 
 class TimeTrackingSystemTests(unittest.TestCase):
@@ -645,6 +1598,21 @@ class TimeTrackingSystemTests(unittest.TestCase):
         self.assertEqual(self.system.register(100, "non-existent"), "invalid_request", "Register for a non-existent worker should fail.")
         self.assertEqual(self.system.get("non-existent"), "", "Get for a non-existent worker should return an empty string.")
 
+    @timeout(0.4)
+    def test_level1_register_rejects_events_before_the_last_one(self):
+        """Tests that a worker's clock events must not go back in time."""
+        # Arrange
+        self.system.add_worker("w1", "Developer", 10)
+        self.system.register(100, "w1")
+        self.system.register(200, "w1")
+
+        # Act & Assert
+        self.assertEqual(self.system.register(50, "w1"), "invalid_request", "An earlier event should be rejected.")
+        self.assertEqual(self.system.register(200, "w1"), "registered", "An event at the last time is fine.")
+        self.system.register(250, "w1")
+        self.assertEqual(self.system.get("w1"), "150")
+        self.assertEqual(self.system.calc_salary("w1", 55, 150), "500")
+
     @timeout(0.4)
     def test_level1_get_work_time_edge_cases(self):
         """Tests 'get' for workers with no sessions or incomplete sessions."""
@@ -743,8 +1711,77 @@ class TimeTrackingSystemTests(unittest.TestCase):
         
         # Schedule one promotion
         self.system.promote("w1", "Senior Developer", 200, 200)
-        # Try to schedule another before the first is activated
-        self.assertEqual(self.system.promote("w1", "Architect", 300, 300), "invalid_request", "Should fail if a promotion is already pending.")
+        # Another one can be queued before the first is activated
+        self.assertEqual(self.system.promote("w1", "Architect", 300, 300), "success")
+
+    @timeout(0.4)
+    def test_level3_queued_promotions_activate_in_order(self):
+        """Tests that several promotions can be queued for a worker and apply in order of effective time."""
+        # Arrange
+        self.system.add_worker("w1", "Developer", 10)
+
+        # Act
+        self.assertEqual(self.system.promote("w1", "Architect", 30, 300), "success")
+        self.assertEqual(self.system.promote("w1", "Senior Developer", 20, 200), "success")
+        self.system.register(100, "w1")
+        self.system.register(400, "w1")
+
+        # Assert
+        # 100-200 at 10, 200-300 at 20, 300-400 at 30
+        self.assertEqual(self.system.calc_salary("w1", 0, 500), "6000")
+        self.assertEqual(self.system.top_n_workers(1, "Architect"), "w1(100)")
+        self.assertEqual(self.system.top_n_workers(1, "Senior Developer"), "")
+
+    @timeout(0.4)
+    def test_level3_promotion_activated_by_another_workers_register(self):
+        """Tests that any register reaching a promotion's effective time activates it."""
+        # Arrange
+        self.system.add_worker("w1", "Developer", 10)
+        self.system.add_worker("w2", "Developer", 10)
+        self.system.promote("w1", "Lead", 20, 200)
+
+        # Act
+        self.system.register(250, "w2")
+
+        # Assert
+        self.assertEqual(self.system.top_n_workers(2, "Lead"), "w1(0)")
+        self.assertEqual(self.system.top_n_workers(2, "Developer"), "w2(0)")
+
+    @timeout(0.4)
+    def test_level3_promotion_effective_at_the_current_time(self):
+        """Tests that a promotion effective at the current time applies at once, and its register only activates it."""
+        # Arrange
+        self.system.add_worker("a", "Developer", 10)
+        self.system.add_worker("w", "Dev", 10)
+        self.system.register(10, "w")
+        self.system.register(15, "a")
+
+        # Act
+        self.assertEqual(self.system.promote("w", "Lead", 20, 15), "success")
+        self.assertEqual(self.system.register(15, "w"), "registered")
+
+        # Assert
+        self.assertEqual(self.system.top_n_workers(5, "Lead"), "w(0)")
+        self.assertEqual(self.system.top_n_workers(5, "Dev"), "")
+        self.assertEqual(self.system.get("w"), "", "The register at 15 should not clock the worker out.")
+
+    @timeout(0.4)
+    def test_level3_promotion_effective_before_the_current_time(self):
+        """Tests that a backdated promotion applies at once, without waiting for the clock to move."""
+        # Arrange
+        self.system.add_worker("w1", "Developer", 10)
+        self.system.register(100, "w1")
+        self.system.register(200, "w1")
+
+        # Act
+        self.system.promote("w1", "Lead", 20, 150)
+
+        # Assert
+        self.assertEqual(self.system.top_n_workers(1, "Lead"), "w1(50)")
+        self.assertEqual(self.system.calc_salary("w1", 0, 300), "1500")
+        self.assertEqual(self.system.register(200, "w1"), "registered", "The register is a normal clock-in.")
+        self.system.register(210, "w1")
+        self.assertEqual(self.system.get("w1"), "110")
 
     @timeout(0.4)
     def test_level3_calc_salary_with_promotion(self):
@@ -792,7 +1829,263 @@ class TimeTrackingSystemTests(unittest.TestCase):
         self.assertEqual(self.system.top_n_workers(1, "Senior"), "w1(20)")
         # The 'get' method should still return total time
         self.assertEqual(self.system.get("w1"), "70") # 50 + 20
-        
+
+    # --------------------------------------------------------------------------
+    # Running Totals and Indexes
+    # --------------------------------------------------------------------------
+
+    @timeout(0.4)
+    def test_get_uses_running_total_of_completed_sessions(self):
+        """Tests that get stays exact over a long history without rescanning it."""
+        # Arrange
+        self.system.add_worker("w1", "Developer", 100)
+        for day in range(5000):
+            self.system.register(day * 100, "w1")
+            self.system.register(day * 100 + 8, "w1")
+
+        # Act
+        self.system.register(500000, "w1")  # An open session does not count yet
+        self.system.register(500000, "w1")  # A zero-length session still completes one
+
+        # Assert
+        for _ in range(5000):
+            self.assertEqual(self.system.get("w1"), str(5000 * 8))
+
+    @timeout(0.4)
+    def test_calc_salary_reprices_sessions_after_a_backdated_promotion(self):
+        """Tests salary queries over many sessions, including a promotion effective in the past."""
+        # Arrange
+        self.system.add_worker("w1", "Developer", 10)
+        for day in range(1000):
+            self.system.register(day * 100, "w1")
+            self.system.register(day * 100 + 50, "w1")
+
+        # Act
+        self.system.promote("w1", "Lead", 20, 50025)  # Effective mid-session on day 500
+        self.system.register(100000, "w1")  # Activates the promotion
+
+        # Assert
+        self.assertEqual(self.system.calc_salary("w1", 0, 50000), str(500 * 50 * 10))
+        self.assertEqual(self.system.calc_salary("w1", 50000, 50050), str(25 * 10 + 25 * 20))
+        self.assertEqual(self.system.calc_salary("w1", 10, 160), str((40 + 50) * 10))
+        self.assertEqual(self.system.calc_salary("w1", 99900, 200000), str(50 * 20))
+        self.assertEqual(self.system.calc_salary("w1", 160, 10), "0")
+
+    @timeout(0.4)
+    def test_leaderboard_follows_sessions_and_promotions(self):
+        """Tests that top_n_workers stays ranked as sessions close and workers change positions."""
+        # Arrange
+        for i in range(2000):
+            self.system.add_worker(f"w{i:04d}", "Developer", 10)
+            self.system.register(0, f"w{i:04d}")
+            self.system.register(i % 100, f"w{i:04d}")
+
+        # Act
+        self.system.promote("w0099", "Lead", 20, 50)
+        self.system.register(50, "w0099")  # Activation only; the session 0-99 spans it
+        self.system.register(60, "w0001")
+        self.system.register(200, "w0001")
+
+        # Assert
+        self.assertEqual(self.system.top_n_workers(3, "Developer"), "w0001(141), w0199(99), w0299(99)")
+        self.assertEqual(self.system.top_n_workers(3, "Lead"), "w0099(49)")
+        self.assertEqual(self.system.top_n_workers(3, "Architect"), "")
+
+    @timeout(0.4)
+    def test_calc_payroll_matches_calc_salary_for_every_worker(self):
+        """Tests that a bulk payroll equals per-worker salaries and skips unknown workers."""
+        # Arrange
+        for i in range(300):
+            worker_id = f"w{i}"
+            self.system.add_worker(worker_id, "Developer", 10 + i)
+            if i % 3 == 0:
+                self.system.promote(worker_id, "Lead", 500, 100)
+            for day in range(5):
+                self.system.register(day * 50 + i % 7, worker_id)
+                self.system.register(day * 50 + 30, worker_id)
+
+        # Act
+        payroll = self.system.calc_payroll(40, 215)
+        subset = self.system.calc_payroll(40, 215, ["w1", "w3", "unknown"])
+
+        # Assert
+        self.assertEqual(len(payroll), 300)
+        for worker_id, salary in payroll.items():
+            self.assertEqual(str(salary), self.system.calc_salary(worker_id, 40, 215))
+        self.assertEqual(subset, {"w1": payroll["w1"], "w3": payroll["w3"]})
+
+    # --------------------------------------------------------------------------
+    # Analytics Across Workers
+    # --------------------------------------------------------------------------
+
+    @timeout(0.4)
+    def test_total_time_between_and_on_the_clock_at(self):
+        """Tests the aggregate time worked in a range and the number of workers clocked in."""
+        # Arrange
+        self.system.add_worker("w1", "Developer", 10)
+        self.system.add_worker("w2", "Designer", 10)
+        self.system.register(100, "w1")
+        self.system.register(150, "w2")
+        self.system.register(200, "w1")
+        self.system.register(250, "w2")
+        self.system.register(300, "w1")
+
+        # Act & Assert
+        self.assertEqual(self.system.total_time_between(0, 400), 200, "The open session counts up to time 300.")
+        self.assertEqual(self.system.total_time_between(120, 180), 90)
+        self.assertEqual(self.system.total_time_between(180, 120), 0)
+        self.assertEqual(self.system.on_the_clock_at(99), 0)
+        self.assertEqual(self.system.on_the_clock_at(150), 2)
+        self.assertEqual(self.system.on_the_clock_at(200), 1, "w1 clocked out at 200.")
+        self.assertEqual(self.system.on_the_clock_at(300), 1)
+
+    @timeout(0.4)
+    def test_time_histogram(self):
+        """Tests bucketing the aggregate time worked, including a shorter last bucket."""
+        # Arrange
+        self.system.add_worker("w1", "Developer", 10)
+        self.system.add_worker("w2", "Designer", 10)
+        for worker_id, start, end in [("w1", 10, 60), ("w2", 40, 45), ("w1", 70, 95)]:
+            self.system.register(start, worker_id)
+            self.system.register(end, worker_id)
+
+        # Act
+        histogram = self.system.time_histogram(0, 90, 25)
+
+        # Assert
+        self.assertEqual(histogram, [15, 30, 15, 15])
+        self.assertEqual(sum(histogram), self.system.total_time_between(0, 90))
+        self.assertEqual(self.system.time_histogram(0, 90, 0), [])
+
+from time_tracking_journal import TimeTrackingJournal
+
+
+class TimeTrackingJournalTests(JournalFixture, unittest.TestCase):
+    """
+    Test suite for restoring a TimeTrackingSystemImpl from a TimeTrackingJournal.
+    """
+
+    failureException = Exception
+    journal_file = "payroll.journal"
+    journal_class = TimeTrackingJournal
+
+    @staticmethod
+    def journal_of(system):
+        return system.journal_
+
+    @staticmethod
+    def recover_from(journal):
+        return TimeTrackingSystemImpl(journal=journal)
+
+    @timeout(0.4)
+    def test_recovers_workers_sessions_and_promotions(self):
+        """Tests that workers, clock events and queued promotions survive a restart."""
+        # Arrange
+        system = TimeTrackingSystemImpl(journal=TimeTrackingJournal(self.path))
+        system.add_worker("w1", "Developer", 10)
+        system.add_worker("w2", "Designer", 20)
+        system.promote("w1", "Lead", 30, 200)
+        system.register(100, "w1")
+        system.register(150, "w1")
+        system.register(120, "w2")
+
+        # Act
+        recovered = self.reopen(system)
+
+        # Assert
+        self.assertEqual(recovered.get("w1"), "50")
+        self.assertEqual(recovered.register(180, "w2"), "registered")
+        self.assertEqual(recovered.get("w2"), "60")
+        recovered.register(200, "w1")
+        self.assertEqual(recovered.top_n_workers(1, "Lead"), "w1(0)", "The queued promotion is restored.")
+        self.assertEqual(self.reopen(recovered).calc_salary("w2", 0, 500), "1200")
+
+    @timeout(0.4)
+    def test_recovers_from_snapshot_and_torn_tail(self):
+        """Tests replay on top of a snapshot, ignoring a record cut short by a crash."""
+        # Arrange
+        system = TimeTrackingSystemImpl(journal=TimeTrackingJournal(self.path, snapshot_interval=4))
+        system.add_worker("w1", "Developer", 10)
+        for timestamp in [10, 20, 30, 40, 50, 60]:
+            system.register(timestamp, "w1")
+
+        # Act
+        system.journal_.close()
+        with open(self.path, "r+b") as journal_file:
+            journal_file.truncate(os.path.getsize(self.path) - 1)
+        recovered = self.reopen(system)
+
+        # Assert
+        self.assertTrue(os.path.exists(self.path + ".snapshot"))
+        self.assertEqual(recovered.get("w1"), "20", "The torn clock-out at 60 is lost.")
+        self.assertEqual(recovered.calc_salary("w1", 0, 100), "200")
+        recovered.register(70, "w1")
+        self.assertEqual(self.reopen(recovered).get("w1"), "40")
+
+from time_tracking_ingest import ingest_clock_events
+
+
+class TimeTrackingIngestTests(unittest.TestCase):
+    """
+    Test suite for registering clock events in batches with TimeTrackingSystemImpl.
+    """
+
+    failureException = Exception
+
+    def setUp(self):
+        self.system = TimeTrackingSystemImpl()
+        self.system.add_worker("w1", "Developer", 10)
+        self.system.add_worker("w2", "Developer", 20)
+
+    @timeout(0.4)
+    def test_register_batch_applies_events_in_timestamp_order(self):
+        """Tests that a batch matches registering its events one by one, in timestamp order."""
+        # Arrange
+        self.system.promote("w1", "Lead", 30, 150)
+        events = [(200, "w1"), (100, "w2"), (100, "w1"), (150, "w2"), ("soon", "w1"), (120, "unknown"), (5,)]
+
+        # Act
+        registered, rejected = self.system.register_batch(events)
+
+        # Assert
+        self.assertEqual((registered, rejected), (4, 3))
+        self.assertEqual(self.system.get("w1"), "100")
+        self.assertEqual(self.system.get("w2"), "50")
+        self.assertEqual(self.system.calc_salary("w1", 0, 300), "2000", "Promoted at 150 during the batch.")
+        self.assertEqual(self.system.top_n_workers(1, "Lead"), "w1(50)")
+
+    @timeout(0.4)
+    def test_register_batch_rejects_events_before_a_workers_last_event(self):
+        """Tests that a late event for a worker is rejected rather than registered out of order."""
+        # Arrange
+        self.system.register_batch([(100, "w1"), (200, "w1")])
+
+        # Act
+        registered, rejected = self.system.register_batch([(150, "w1"), (300, "w1"), (180, "w2")])
+
+        # Assert
+        self.assertEqual((registered, rejected), (2, 1))
+        self.assertEqual(self.system.get("w1"), "100")
+
+    @timeout(0.4)
+    def test_ingest_clock_events_from_file(self):
+        """Tests streaming events from a file in several batches and reporting the counts."""
+        # Arrange
+        events_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(events_dir.cleanup)
+        path = os.path.join(events_dir.name, "badges.csv")
+        with open(path, "w") as events_file:
+            events_file.write("10,w1\n20,w2\n\nnoon,w1\n40,w1\n50,w3\n60,w2\n")
+
+        # Act
+        report = ingest_clock_events(self.system, path, batch_size=2)
+
+        # Assert
+        self.assertEqual((report.registered, report.rejected), (4, 2))
+        self.assertEqual(self.system.get("w1"), "30")
+        self.assertEqual(self.system.get("w2"), "40")
+        self.assertGreater(report.events_per_second, 0)
+
 from course_system_impl import CourseSystemImpl
 
 class Level1Tests(unittest.TestCase):
@@ -1,138 +1,594 @@
+import bisect
+from collections import deque
+import os
+import pickle
+import struct
+import time
 import typing as tp
+import zlib
+
+from rope import Rope
+from text_editor_journal import CLIPBOARD, EDIT, MERGE, REDO, UNDO, EditorJournal
+
+# What editor operations return: the text, or in lazy mode an immutable Rope handle
+# that supports str(), len(), substring() and comparison with strings.
+Document = tp.Union[str, Rope]
+
+class _Edit(tp.NamedTuple):
+    """
+    One history entry: `removed` was replaced by `inserted` at `position`, along with
+    the cursor and selection before and after. Operations that do not change the text
+    (MOVE, SELECT) have empty `removed` and `inserted`.
+    """
+    position: int
+    removed: str
+    inserted: str
+    cursor_before: int
+    selection_before: tp.Tuple[int, int]
+    cursor_after: int
+    selection_after: tp.Tuple[int, int]
+
+# Rough in-memory cost of one history entry besides its text, in bytes.
+_EDIT_OVERHEAD = 120
+
+# Spill files are a series of frames, each a length followed by a compressed chunk.
+_SPILL_FRAME = struct.Struct("<I")
+
+def _edit_size(edit: _Edit) -> int:
+    return _EDIT_OVERHEAD + len(edit.removed) + len(edit.inserted)
+
+def _occurrences(text: str, pattern: str) -> tp.Iterator[int]:
+    """Yields the start of every occurrence of pattern in text, overlapping ones included."""
+    index = text.find(pattern)
+    while index != -1:
+        yield index
+        index = text.find(pattern, index + 1)
+
+class Clipboard:
+    """Holds the most recently cut text. Editors given the same Clipboard share it."""
+
+    __slots__ = ("text",)
+
+    def __init__(self):
+        self.text: tp.Optional[str] = None
 
 class TextEditorImpl:
     """
     Implements a simplified text editor with undo/redo functionality.
-    
+
     The editor maintains state for the document text, cursor position,
     text selection, and a clipboard. All state-modifying operations
     are recorded in a history list to enable undo and redo.
+
+    The document is held in an immutable Rope, so edits at the cursor cost
+    O(log n). History entries are invertible edits rather than snapshots, so
+    memory and undo/redo cost grow with the size of each edit, not the document.
+
+    In lazy mode, operations return the Rope itself instead of a string. The
+    handle is O(1) to produce and stays valid after later edits; clients that
+    only need part of the text can use get_text(start, end) instead.
+
+    With a coalesce window, bursts of adjacent typing (or forward deletes at the
+    same spot) are merged into a single history entry, so one UNDO reverts the
+    whole burst.
+
+    The occurrences of the last pattern searched for are cached and patched
+    after every edit by re-searching only around the change, so repeated
+    searches while editing do not rescan the document.
+
+    Given an EditorJournal, every change is logged as it happens, and a new
+    editor on the same journal recovers the text, cursor, selection, clipboard
+    and undo/redo history after a crash.
     """
-    
-    def __init__(self):
-        """Initializes the text editor to an empty state."""
+
+    def __init__(self, history_limit: tp.Optional[int] = None, lazy: bool = False,
+                 clipboard: tp.Optional[Clipboard] = None, coalesce_window: float = 0,
+                 coalesce_limit: int = 64, clock: tp.Callable[[], float] = time.monotonic,
+                 journal: tp.Optional[EditorJournal] = None,
+                 on_history_change: tp.Optional[tp.Callable[["TextEditorImpl", int], None]] = None):
+        """
+        Initializes the text editor to an empty state.
+        `history_limit` caps the number of undoable operations (None keeps all of them).
+        `lazy` makes operations return a Rope handle instead of materializing the text.
+        `clipboard` lets several editors share one clipboard.
+        `coalesce_window` is the longest pause, in `clock` seconds, between edits that
+        are merged into one history entry (0 disables merging); `coalesce_limit` caps
+        the characters in a merged entry.
+        `journal` logs every change; the editor starts from the state it recovers.
+        `on_history_change` is called with the editor and the change in history_size()
+        at the end of every operation that changed it.
+        """
         # Core state variables
-        self._doc: str = ""
+        self._doc: Rope = Rope()
         self._cursor: int = 0
         self._selection: tp.Tuple[int, int] = (-1, -1)
-        self._clipboard: tp.Optional[str] = None
-        
+        self._clipboard: Clipboard = clipboard if clipboard is not None else Clipboard()
+        self._lazy = lazy
+        # (rope, text): the materialized text of the last document returned
+        self._text_cache: tp.Tuple[Rope, str] = (self._doc, "")
+
         # History variables for undo/redo (Level 3)
-        self._version: int = 0
-        # History stores tuples of the entire editor state: (doc, cursor, selection)
-        self._history: tp.Dict[int, tp.Tuple[str, int, tp.Tuple[int, int]]] = {
-            0: (self._doc, self._cursor, self._selection)
-        }
-        self._can_redo: bool = False
-
-    def _save_state(self):
-        """Saves the current editor state to the history for undo/redo."""
+        # The oldest entries fall off the undo stack once history_limit is reached.
+        self._undo_stack: tp.Deque[_Edit] = deque(maxlen=history_limit)
+        self._redo_stack: tp.List[_Edit] = []
+        # Estimated memory held by both stacks, and where they were spilled to, if anywhere.
+        self._history_bytes: int = 0
+        self._spill_path: tp.Optional[str] = None
+        # Edits made while the history is spilled stay in memory on top of it. They
+        # erase its redo entries, which this records until the next spill or load.
+        self._spilled_redo_cleared = False
+        # Set once recovery is done; _reported_history_bytes is the size last passed to it.
+        self._on_history_change: tp.Optional[tp.Callable[[TextEditorImpl, int], None]] = None
+        self._reported_history_bytes = 0
+
+        # Coalescing of bursty edits; _last_edit_time is None when the top of the
+        # undo stack must not be extended (nothing recorded yet, or after UNDO/REDO).
+        self._coalesce_window = coalesce_window
+        self._coalesce_limit = coalesce_limit
+        self._clock = clock
+        self._last_edit_time: tp.Optional[float] = None
+
+        # The occurrences of the last pattern searched for, kept as a gap buffer around
+        # the last edit: (pattern, head, tail). head holds the offsets before the gap in
+        # increasing order; tail holds the ones after it as distances from the end of the
+        # document, nearest the gap last. Edits only move entries near them.
+        self._matches: tp.Optional[tp.Tuple[str, tp.List[int], tp.List[int]]] = None
+
+        self._journal: tp.Optional[EditorJournal] = None
+        if journal is not None:
+            self._recover(journal)
+            self._journal = journal
+        self._on_history_change = on_history_change
+        self._reported_history_bytes = self._history_bytes
+
+    def _replace(self, start: int, end: int, text: str) -> tp.Tuple[int, str, str]:
+        """
+        Sets the document to doc[:start] + text + doc[end:] and returns the change
+        as (position, removed, inserted).
+        """
+        start, end, _ = slice(start, end).indices(len(self._doc))
+        if start <= end:
+            change = (start, self._doc.substring(start, end), text)
+        else:
+            # The prefix and suffix overlap, so doc[end:start] appears twice afterwards.
+            change = (start, "", text + self._doc.substring(end, start))
+        self._apply(*change)
+        return change
+
+    def _apply(self, position: int, old: str, new: str):
+        """Replaces `old`, found at `position`, with `new`."""
+        if old or new:
+            self._doc = self._doc[:position] + new + self._doc[position + len(old):]
+            if self._matches is not None:
+                self._update_matches(position, len(old), len(new))
+
+    def _update_matches(self, position: int, old_length: int, new_length: int):
+        """
+        Patches the cached occurrences after `old_length` characters at `position`
+        were replaced by `new_length` new ones.
+        """
+        pattern, head, tail = self._matches
+        old_size = len(self._doc) - new_length + old_length
+
+        # Move the gap to the first offset an occurrence overlapping the edit can start at.
+        gap = position - len(pattern) + 1
+        while head and head[-1] >= gap:
+            tail.append(old_size - head.pop())
+        while tail and old_size - tail[-1] < gap:
+            head.append(old_size - tail.pop())
+
+        # Occurrences overlapping the replaced text are gone; the ones after it keep
+        # their distance from the end.
+        while tail and old_size - tail[-1] < position + old_length:
+            tail.pop()
+
+        # Only occurrences overlapping the new text can be new, so search just around it.
+        window_start = max(gap, 0)
+        window = self._doc.substring(window_start, position + new_length + len(pattern) - 1)
+        head.extend(window_start + index for index in _occurrences(window, pattern))
+
+    def _save_state(self, cursor_before: int, selection_before: tp.Tuple[int, int],
+                    change: tp.Tuple[int, str, str] = (0, "", ""), mergeable: bool = True):
+        """
+        Records the last operation in the history for undo/redo. Operations that are
+        not `mergeable` are never coalesced with their neighbours.
+        """
+        edit = _Edit(*change, cursor_before, selection_before, self._cursor, self._selection)
+        merged = False
+        if not mergeable:
+            self._last_edit_time = None
+        else:
+            merged = self._coalesce(edit)
+        self._push(edit, merged)
+
+        if self._journal is not None:
+            self._journal.append_edit(merged, edit)
+            self._maybe_checkpoint()
+        self._report_history_size()
+
+    def _push(self, edit: _Edit, merged: bool):
+        """Pushes an edit onto the undo stack, or merges it into the top entry."""
         # If a new action is taken after an undo, the previous "future" is erased.
-        if self._can_redo:
-            keys_to_delete = [k for k in self._history if k > self._version]
-            for k in keys_to_delete:
-                del self._history[k]
-        
-        self._version += 1
-        self._history[self._version] = (self._doc, self._cursor, self._selection)
-        self._can_redo = False
+        self._history_bytes -= sum(_edit_size(entry) for entry in self._redo_stack)
+        self._redo_stack.clear()
+        if self._spill_path is not None:
+            self._spilled_redo_cleared = True
+
+        if merged:
+            last = self._undo_stack[-1]
+            self._undo_stack[-1] = _Edit(last.position, last.removed + edit.removed, last.inserted + edit.inserted,
+                                         last.cursor_before, last.selection_before,
+                                         edit.cursor_after, edit.selection_after)
+            self._history_bytes += _edit_size(self._undo_stack[-1]) - _edit_size(last)
+            return
 
-    def append(self, text: str) -> str:
+        if len(self._undo_stack) == self._undo_stack.maxlen:
+            if not self._undo_stack:  # history_limit=0 keeps no history at all
+                return
+            self._history_bytes -= _edit_size(self._undo_stack[0])
+        self._undo_stack.append(edit)
+        self._history_bytes += _edit_size(edit)
+
+    def _coalesce(self, edit: _Edit) -> bool:
+        """
+        Returns whether the edit should be merged into the top history entry, because
+        both are part of the same burst of typing or forward deletes.
+        """
+        now = self._clock()
+        last_time, self._last_edit_time = self._last_edit_time, now
+        if not self._coalesce_window or last_time is None or now - last_time > self._coalesce_window:
+            return False
+        if not self._undo_stack:
+            return False
+
+        last = self._undo_stack[-1]
+        no_selection = last.selection_before == edit.selection_before == (-1, -1)
+        typing = (not last.removed and not edit.removed and last.inserted and edit.inserted
+                  and edit.position == last.position + len(last.inserted))
+        deleting = (not last.inserted and not edit.inserted and last.removed and edit.removed
+                    and edit.position == last.position)
+        fits = len(last.removed) + len(last.inserted) + len(edit.removed) + len(edit.inserted) <= self._coalesce_limit
+        return bool(no_selection and (typing or deleting) and fits)
+
+    def history_size(self) -> int:
+        """Returns the estimated memory, in bytes, held by the undo/redo history."""
+        return self._history_bytes
+
+    def _report_history_size(self):
+        """Passes the change in history size since the last report to on_history_change."""
+        delta = self._history_bytes - self._reported_history_bytes
+        if delta and self._on_history_change is not None:
+            self._reported_history_bytes = self._history_bytes
+            self._on_history_change(self, delta)
+
+    def spill_history(self, path: str):
+        """
+        Writes the undo/redo history to a compressed file at path and frees it from
+        memory. It is read back automatically the next time undo or redo needs it;
+        new edits do not need it. If the history is already spilled, the entries
+        added since are appended to its file instead, so spilling a growing history
+        again costs only the new entries.
+
+        While the next edit may still be coalesced into the top undo entry, that
+        entry stays in memory, so spilling never changes how edits are grouped.
+        """
+        kept = []
+        if self._coalesce_window and self._last_edit_time is not None and self._undo_stack:
+            kept.append(self._undo_stack.pop())
+        if self._spill_path is not None and not self._undo_stack and not self._redo_stack:
+            self._undo_stack.extend(kept)
+            return  # Nothing new to write
+
+        mode = "ab" if self._spill_path is not None else "wb"
+        if self._spill_path is None:
+            self._spill_path = path
+        chunk = ([tuple(edit) for edit in self._undo_stack], [tuple(edit) for edit in self._redo_stack],
+                 self._spilled_redo_cleared)
+        data = zlib.compress(pickle.dumps(chunk, pickle.HIGHEST_PROTOCOL))
+        with open(self._spill_path, mode) as spill_file:
+            spill_file.write(_SPILL_FRAME.pack(len(data)) + data)
+
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+        self._undo_stack.extend(kept)
+        self._history_bytes = sum(map(_edit_size, kept))
+        self._spilled_redo_cleared = False
+        self._report_history_size()
+
+    def discard_spilled_history(self):
+        """Removes the spill file, if any, without loading it back."""
+        if self._spill_path is not None:
+            os.remove(self._spill_path)
+            self._spill_path = None
+            self._spilled_redo_cleared = False
+
+    def _load_history(self):
+        """Reads back a spilled history, below any entries added since it was spilled."""
+        if self._spill_path is None:
+            return
+
+        with open(self._spill_path, "rb") as spill_file:
+            data = spill_file.read()
+        undo_entries: tp.List[tuple] = []
+        redo_entries: tp.List[tuple] = []
+        offset = 0
+        while offset < len(data):
+            (length,) = _SPILL_FRAME.unpack_from(data, offset)
+            offset += _SPILL_FRAME.size
+            chunk_undo, chunk_redo, clears_redo = pickle.loads(zlib.decompress(data[offset:offset + length]))
+            offset += length
+            if clears_redo:
+                redo_entries = []
+            undo_entries.extend(chunk_undo)
+            redo_entries.extend(chunk_redo)
+        if self._spilled_redo_cleared:
+            redo_entries = []
+        self.discard_spilled_history()
+
+        undo_entries.extend(tuple(edit) for edit in self._undo_stack)
+        self._undo_stack.clear()
+        self._restore_history(undo_entries, redo_entries)
+
+    def _restore_history(self, undo_entries: tp.Iterable[tuple], redo_entries: tp.Iterable[tuple]):
+        self._undo_stack.extend(_Edit(*entry) for entry in undo_entries)
+        self._redo_stack.extend(_Edit(*entry) for entry in redo_entries)
+        self._history_bytes = sum(map(_edit_size, self._undo_stack)) + sum(map(_edit_size, self._redo_stack))
+
+    # --------------------------------------------------------------------------
+    # Journal and Recovery
+    # --------------------------------------------------------------------------
+
+    def _recover(self, journal: EditorJournal):
+        """Restores the state saved in the journal's checkpoint and replays the records after it."""
+        state, records = journal.recover()
+        if state is not None:
+            self._doc = Rope(state["text"])
+            self._cursor, self._selection = state["cursor"], tuple(state["selection"])
+            self._clipboard.text = state["clipboard"]
+            self._restore_history(state["undo"], state["redo"])
+
+        for kind, value in records:
+            if kind in (EDIT, MERGE):
+                edit = _Edit(*value)
+                self._apply(edit.position, edit.removed, edit.inserted)
+                self._cursor, self._selection = edit.cursor_after, edit.selection_after
+                self._push(edit, kind == MERGE)
+            elif kind == UNDO:
+                self.undo()
+            elif kind == REDO:
+                self.redo()
+            elif kind == CLIPBOARD:
+                self._clipboard.text = value
+
+    def _maybe_checkpoint(self):
+        """Writes a checkpoint of the full state once the journal has grown long enough."""
+        if not self._journal.needs_checkpoint():
+            return
+
+        self._load_history()
+        self._journal.checkpoint({
+            "text": str(self._doc),
+            "cursor": self._cursor,
+            "selection": self._selection,
+            "clipboard": self._clipboard.text,
+            "undo": [tuple(edit) for edit in self._undo_stack],
+            "redo": [tuple(edit) for edit in self._redo_stack],
+        })
+
+    def _text(self) -> str:
+        """Returns the document as a string, materializing it only when it has changed."""
+        if self._text_cache[0] is not self._doc:
+            self._text_cache = (self._doc, str(self._doc))
+        return self._text_cache[1]
+
+    def _result(self) -> Document:
+        """Returns the document in the form the caller asked for."""
+        return self._doc if self._lazy else self._text()
+
+    def get_text(self, start: int = 0, end: tp.Optional[int] = None) -> str:
+        """Returns the text between start and end without materializing the rest."""
+        if end is None:
+            end = len(self._doc)
+        if self._text_cache[0] is self._doc:
+            return self._text_cache[1][start:end]
+        return self._doc.substring(start, end)
+
+    # --------------------------------------------------------------------------
+    # Line and Column Positions (0-based)
+    # --------------------------------------------------------------------------
+
+    def _line_start(self, line: int) -> int:
+        """Returns the offset where a line begins; line must be in range."""
+        return 0 if line == 0 else self._doc.find_newline(line - 1) + 1
+
+    def offset_to_linecol(self, offset: int) -> tp.Tuple[int, int]:
+        """Converts a document offset to a (line, column) pair."""
+        offset = max(0, min(int(offset), len(self._doc)))
+        line = self._doc.count_newlines(offset)
+        return line, offset - self._line_start(line)
+
+    def linecol_to_offset(self, line: int, column: int) -> int:
+        """
+        Converts a (line, column) pair to a document offset. Out-of-range lines and
+        columns are clamped to the document and to the end of the line.
+        """
+        line = max(0, min(int(line), self._doc.count_newlines()))
+        line_start = self._line_start(line)
+        line_end = self._doc.find_newline(line)
+        if line_end == -1:  # The last line runs to the end of the document
+            line_end = len(self._doc)
+        return min(line_start + max(0, int(column)), line_end)
+
+    def move_to_line(self, line: int, column: int = 0) -> Document:
+        """Moves the cursor to a (line, column) position and clears any selection."""
+        return self.move(self.linecol_to_offset(line, column))
+
+    def append(self, text: str) -> Document:
         """
         Appends text. If a selection exists, it replaces the selected text.
         Otherwise, it inserts the text at the cursor position.
         """
+        cursor_before, selection_before = self._cursor, self._selection
         start, end = self._selection
         if start != -1:  # A selection exists
-            self._doc = self._doc[:start] + text + self._doc[end:]
+            change = self._replace(start, end, text)
             self._cursor = start + len(text)
             self._selection = (-1, -1)
         else:  # No selection, insert at cursor
-            self._doc = self._doc[:self._cursor] + text + self._doc[self._cursor:]
+            change = self._replace(self._cursor, self._cursor, text)
             self._cursor += len(text)
-        
-        self._save_state()
-        return self._doc
 
-    def delete(self) -> str:
+        self._save_state(cursor_before, selection_before, change)
+        return self._result()
+
+    def delete(self) -> Document:
         """
         Deletes text. If a selection exists, it deletes the selected text.
         Otherwise, it deletes the character after the cursor.
         """
+        cursor_before, selection_before = self._cursor, self._selection
+        change = (0, "", "")
         start, end = self._selection
         if start != -1:  # A selection exists
-            self._doc = self._doc[:start] + self._doc[end:]
+            change = self._replace(start, end, "")
             self._cursor = start
             self._selection = (-1, -1)
         elif self._cursor < len(self._doc):  # No selection, delete one char
-            self._doc = self._doc[:self._cursor] + self._doc[self._cursor + 1:]
-        
-        self._save_state()
-        return self._doc
+            change = self._replace(self._cursor, self._cursor + 1, "")
+
+        self._save_state(cursor_before, selection_before, change)
+        return self._result()
 
-    def move(self, offset: int) -> str:
+    def move(self, offset: int) -> Document:
         """Moves the cursor to a specific offset and clears any selection."""
+        cursor_before, selection_before = self._cursor, self._selection
         offset = int(offset)
         # Clamp the cursor position within the valid range [0, len(doc)]
         self._cursor = max(0, min(offset, len(self._doc)))
         self._selection = (-1, -1)
-        
-        self._save_state()
-        return self._doc
 
-    def select(self, start: int, end: int) -> str:
+        self._save_state(cursor_before, selection_before)
+        return self._result()
+
+    def select(self, start: int, end: int) -> Document:
         """Selects a portion of the text from a start to an end index."""
+        cursor_before, selection_before = self._cursor, self._selection
         self._selection = (int(start), int(end))
         self._cursor = int(end)
-        
-        self._save_state()
-        return self._doc
 
-    def cut(self) -> str:
+        self._save_state(cursor_before, selection_before)
+        return self._result()
+
+    def cut(self) -> Document:
         """Cuts the selected text to the clipboard."""
         start, end = self._selection
         if start == -1:  # No selection, do nothing
-            return self._doc
-            
-        self._clipboard = self._doc[start:end]
-        self._doc = self._doc[:start] + self._doc[end:]
+            return self._result()
+
+        cursor_before, selection_before = self._cursor, self._selection
+        self._clipboard.text = self._doc.substring(start, end)
+        if self._journal is not None:
+            self._journal.append_clipboard(self._clipboard.text)
+        change = self._replace(start, end, "")
         self._cursor = start
         self._selection = (-1, -1)
-        
-        self._save_state()
-        return self._doc
 
-    def paste(self) -> str:
+        self._save_state(cursor_before, selection_before, change)
+        return self._result()
+
+    def paste(self) -> Document:
         """Pastes the clipboard content at the cursor position."""
-        if self._clipboard is None:  # Empty clipboard, do nothing
-            return self._doc
-            
-        self._doc = self._doc[:self._cursor] + self._clipboard + self._doc[self._cursor:]
-        self._cursor += len(self._clipboard)
-        
-        self._save_state()
-        return self._doc
-
-    def undo(self) -> str:
+        text = self._clipboard.text
+        if text is None:  # Empty clipboard, do nothing
+            return self._result()
+
+        cursor_before, selection_before = self._cursor, self._selection
+        change = self._replace(self._cursor, self._cursor, text)
+        self._cursor += len(text)
+
+        self._save_state(cursor_before, selection_before, change)
+        return self._result()
+
+    def undo(self) -> Document:
         """Reverts the editor to the state before the last operation."""
-        if self._version > 0:
-            self._version -= 1
-            self._doc, self._cursor, self._selection = self._history[self._version]
-            self._can_redo = True
-        
-        return self._doc
+        self._load_history()
+        self._last_edit_time = None
+        if self._undo_stack:
+            edit = self._undo_stack.pop()
+            self._apply(edit.position, edit.inserted, edit.removed)
+            self._cursor, self._selection = edit.cursor_before, edit.selection_before
+            self._redo_stack.append(edit)
+            if self._journal is not None:
+                self._journal.append_undo()
+                self._maybe_checkpoint()
 
-    def redo(self) -> str:
+        self._report_history_size()
+        return self._result()
+
+    def redo(self) -> Document:
         """
         Re-applies an undone operation. This is only possible if no new
         operations were performed after the UNDO.
         """
-        if self._can_redo and (self._version + 1) in self._history:
-            self._version += 1
-            self._doc, self._cursor, self._selection = self._history[self._version]
-        
-        # If we reach the end of the redo chain, we can't redo further.
-        if (self._version + 1) not in self._history:
-            self._can_redo = False
+        self._load_history()
+        self._last_edit_time = None
+        if self._redo_stack:
+            edit = self._redo_stack.pop()
+            self._apply(edit.position, edit.removed, edit.inserted)
+            self._cursor, self._selection = edit.cursor_after, edit.selection_after
+            self._undo_stack.append(edit)
+            if self._journal is not None:
+                self._journal.append_redo()
+                self._maybe_checkpoint()
+
+        self._report_history_size()
+        return self._result()
+
+    # --------------------------------------------------------------------------
+    # Search and Replace
+    # --------------------------------------------------------------------------
+
+    def find_all(self, pattern: str) -> tp.List[int]:
+        """
+        Returns the start offsets of every occurrence of pattern, overlapping ones
+        included, in increasing order. An empty pattern matches nothing.
+        """
+        if not pattern:
+            return []
+        if self._matches is None or self._matches[0] != pattern:
+            self._matches = (pattern, list(_occurrences(self._text(), pattern)), [])
+        _, head, tail = self._matches
+        size = len(self._doc)
+        return head + [size - distance for distance in reversed(tail)]
+
+    def replace_all(self, pattern: str, text: str) -> Document:
+        """
+        Replaces the non-overlapping occurrences of pattern, chosen left to right as
+        str.replace does, with text. This is a single operation for undo/redo. The
+        selection is cleared and the cursor keeps its place relative to the text
+        around it (a cursor inside a match moves to the end of its replacement).
+        """
+        matches: tp.List[int] = []
+        for match in self.find_all(pattern):
+            if not matches or match >= matches[-1] + len(pattern):
+                matches.append(match)
+        if not matches:
+            return self._result()
+
+        cursor_before, selection_before = self._cursor, self._selection
+        shift = len(text) - len(pattern)
+        # Matches ending at or before the cursor move it by `shift` each.
+        before = bisect.bisect_right(matches, self._cursor - len(pattern))
+        self._cursor += before * shift
+        if before < len(matches) and matches[before] < cursor_before:
+            self._cursor = matches[before] + before * shift + len(text)
+        self._selection = (-1, -1)
+
+        # One edit spanning the first to the last match keeps history entries uniform.
+        start, end = matches[0], matches[-1] + len(pattern)
+        removed = self._doc.substring(start, end)
+        change = (start, removed, removed.replace(pattern, text))
+        self._apply(*change)
 
-        return self._doc
+        self._save_state(cursor_before, selection_before, change, mergeable=False)
+        return self._result()
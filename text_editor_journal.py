@@ -0,0 +1,76 @@
+import struct
+import typing as tp
+
+from record_journal import RecordJournal, decode_text, encode_text
+
+# Record kinds
+EDIT = 0       # An edit pushed onto the undo stack
+MERGE = 1      # An edit coalesced into the top of the undo stack
+UNDO = 2
+REDO = 3
+CLIPBOARD = 4  # The clipboard was set
+
+_EDIT_FIELDS = struct.Struct("<7qI")  # position, cursor and selection before and after, removed length
+
+# Every edit field as a plain tuple:
+# (position, removed, inserted, cursor_before, selection_before, cursor_after, selection_after)
+EditFields = tp.Tuple[int, str, str, int, tp.Tuple[int, int], int, tp.Tuple[int, int]]
+
+class EditorJournal(RecordJournal):
+    """
+    A crash-safe log of one TextEditorImpl's state changes.
+
+    Every change is appended to a binary journal as soon as it happens. Every
+    `checkpoint_interval` records, the editor's full state is written to a
+    compressed checkpoint file and the journal starts over, so recovery only
+    replays at most that many records. See RecordJournal for how a crash at any
+    point is recovered from.
+    """
+
+    MAGIC = b"TEJ1"
+
+    def __init__(self, path: str, checkpoint_interval: int = 1000, fsync: bool = False):
+        """
+        Opens the journal at path; the checkpoint is kept next to it.
+        - checkpoint_interval: Records written between checkpoints.
+        - fsync: Also force every write to disk, surviving power loss and not only a
+          crash of the process (much slower).
+        """
+        super().__init__(path, path + ".checkpoint", checkpoint_interval, fsync)
+
+    def _decode_payload(self, kind: int, payload: bytes) -> tp.Any:
+        if kind in (EDIT, MERGE):
+            (position, cursor_before, selection_start_before, selection_end_before,
+             cursor_after, selection_start_after, selection_end_after, removed_length) = _EDIT_FIELDS.unpack_from(payload)
+            texts = payload[_EDIT_FIELDS.size:]
+            return (position, decode_text(texts[:removed_length]), decode_text(texts[removed_length:]),
+                    cursor_before, (selection_start_before, selection_end_before),
+                    cursor_after, (selection_start_after, selection_end_after))
+        if kind == CLIPBOARD:
+            return decode_text(payload[1:]) if payload[:1] == b"\x01" else None
+        return None
+
+    def append_edit(self, merged: bool, edit: EditFields):
+        """Records an edit pushed onto (or, if merged, coalesced into) the undo stack."""
+        position, removed, inserted, cursor_before, selection_before, cursor_after, selection_after = edit
+        removed_bytes = encode_text(removed)
+        fields = _EDIT_FIELDS.pack(position, cursor_before, *selection_before, cursor_after, *selection_after,
+                                   len(removed_bytes))
+        self._append(MERGE if merged else EDIT, fields + removed_bytes + encode_text(inserted))
+
+    def append_undo(self):
+        self._append(UNDO)
+
+    def append_redo(self):
+        self._append(REDO)
+
+    def append_clipboard(self, text: tp.Optional[str]):
+        self._append(CLIPBOARD, b"\x00" if text is None else b"\x01" + encode_text(text))
+
+    def needs_checkpoint(self) -> bool:
+        """Returns whether enough records were written since the last checkpoint."""
+        return self._state_due()
+
+    def checkpoint(self, state: dict):
+        """Saves the full editor state and starts a new, empty journal."""
+        self._save_state(state)
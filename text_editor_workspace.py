@@ -0,0 +1,138 @@
+from collections import OrderedDict
+import itertools
+import os
+import shutil
+import tempfile
+import typing as tp
+
+from text_editor_impl import Clipboard, TextEditorImpl
+
+class EditorWorkspace:
+    """
+    Hosts many editing sessions, one TextEditorImpl per (user, document).
+
+    All of a user's sessions share one clipboard. The undo/redo histories of all
+    sessions are kept under a global memory budget: whenever opening or editing a
+    session exceeds it, the histories of the least recently used sessions are
+    spilled to compressed files and read back transparently the next time those
+    sessions need them. A session whose next edit may still be coalesced keeps
+    its top undo entry in memory.
+    """
+
+    def __init__(self, history_budget: int, spill_dir: tp.Optional[str] = None, **editor_options):
+        """
+        Initializes an empty workspace.
+        - history_budget: Bytes of history to keep in memory across all sessions.
+        - spill_dir: Directory for spilled histories (a temporary one is created on first use
+          and removed by close_all).
+        - editor_options: Passed to every TextEditorImpl (e.g. history_limit, lazy).
+        """
+        self.history_budget = history_budget
+        self.spill_dir = spill_dir
+        # Whether spill_dir is a temporary directory this workspace created (and removes in close_all).
+        self._owns_spill_dir = False
+        self._editor_options = editor_options
+
+        # {(user_id, document_id): editor}
+        self._sessions: tp.Dict[tp.Tuple[str, str], TextEditorImpl] = {}
+        # {editor: (user_id, document_id)}, for the editors' history reports
+        self._session_keys: tp.Dict[TextEditorImpl, tp.Tuple[str, str]] = {}
+        # Sessions holding history in memory, ordered from least to most recently used
+        self._resident: tp.OrderedDict[TextEditorImpl, None] = OrderedDict()
+        # Bytes of history held by all sessions, kept up to date by their reports
+        self._usage = 0
+        # {user_id: clipboard} and {user_id: open sessions}
+        self._clipboards: tp.Dict[str, Clipboard] = {}
+        self._user_sessions: tp.Dict[str, int] = {}
+        self._spill_ids = itertools.count()
+
+    def open(self, user_id: str, document_id: str) -> TextEditorImpl:
+        """
+        Returns the user's editor for a document, creating it if needed.
+        """
+        key = (user_id, document_id)
+        editor = self._sessions.get(key)
+        if editor is None:
+            clipboard = self._clipboards.setdefault(user_id, Clipboard())
+            editor = TextEditorImpl(clipboard=clipboard, on_history_change=self._on_history_change,
+                                    **self._editor_options)
+            self._sessions[key] = editor
+            self._session_keys[editor] = key
+            self._user_sessions[user_id] = self._user_sessions.get(user_id, 0) + 1
+            self._usage += editor.history_size()
+
+        if editor.history_size():
+            self._resident[editor] = None
+            self._resident.move_to_end(editor)
+        # The session is about to be used, so it is not spilled here.
+        self._enforce_budget(spare=editor)
+        return editor
+
+    def close(self, user_id: str, document_id: str) -> bool:
+        """
+        Ends a session, dropping its editor and any spilled history.
+        """
+        editor = self._sessions.pop((user_id, document_id), None)
+        if editor is None:
+            return False
+
+        del self._session_keys[editor]
+        self._resident.pop(editor, None)
+        self._usage -= editor.history_size()
+        editor.discard_spilled_history()
+        self._user_sessions[user_id] -= 1
+        if not self._user_sessions[user_id]:
+            del self._user_sessions[user_id]
+            del self._clipboards[user_id]
+        return True
+
+    def close_all(self):
+        """Ends every session, discarding all spilled histories and the temporary spill directory."""
+        for user_id, document_id in list(self._sessions):
+            self.close(user_id, document_id)
+        if self._owns_spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+            self._owns_spill_dir = False
+
+    def history_usage(self) -> int:
+        """Returns the estimated bytes of history currently held in memory."""
+        return self._usage
+
+    def _on_history_change(self, editor: TextEditorImpl, delta: int):
+        """Keeps the usage up to date as an editor's history grows or shrinks."""
+        if editor not in self._session_keys:
+            return  # A closed session
+
+        self._usage += delta
+        if not editor.history_size():
+            self._resident.pop(editor, None)
+        elif delta > 0:
+            self._resident[editor] = None
+            self._resident.move_to_end(editor)
+            # Other sessions go first, but once the change is complete this one may be
+            # spilled too if its history alone is over the budget.
+            self._enforce_budget(spare=editor)
+            self._enforce_budget()
+
+    def _enforce_budget(self, spare: tp.Optional[TextEditorImpl] = None):
+        """Spills the least recently used sessions' histories, except spare's, until usage fits the budget."""
+        if self._usage <= self.history_budget:
+            return
+
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="editor_history_")
+            self._owns_spill_dir = True
+
+        while self._usage > self.history_budget and self._resident:
+            editor = next(iter(self._resident))
+            if editor is spare:
+                if len(self._resident) == 1:
+                    break
+                self._resident.move_to_end(editor)
+                continue
+            # A spilled editor may keep its top entry in memory, but has nothing more to
+            # spill until its history grows again and puts it back in _resident.
+            del self._resident[editor]
+            # Reports the freed bytes back through _on_history_change.
+            editor.spill_history(os.path.join(self.spill_dir, f"{next(self._spill_ids)}.history"))
@@ -0,0 +1,60 @@
+import itertools
+import os
+import time
+import typing as tp
+
+from time_tracking_system_impl import TimeTrackingSystemImpl
+
+ClockEvent = tp.Tuple[tp.Any, tp.Any]  # (timestamp, worker_id), not validated yet
+
+class IngestReport(tp.NamedTuple):
+    registered: int
+    rejected: int
+    seconds: float
+
+    @property
+    def events_per_second(self) -> float:
+        total = self.registered + self.rejected
+        return total / self.seconds if self.seconds > 0 else float(total)
+
+def read_clock_events(path: str) -> tp.Iterator[ClockEvent]:
+    """
+    Yields the clock events in a file with one `timestamp,worker_id` line each.
+    Blank lines are skipped; lines whose timestamp is not an integer are yielded
+    with None as their timestamp, so ingestion counts them as rejected.
+    """
+    with open(path) as events_file:
+        for line in events_file:
+            line = line.strip()
+            if not line:
+                continue
+            timestamp, _, worker_id = line.partition(",")
+            try:
+                yield int(timestamp), worker_id.strip()
+            except ValueError:
+                yield None, worker_id.strip()
+
+def ingest_clock_events(system: TimeTrackingSystemImpl,
+                        source: tp.Union[str, os.PathLike, tp.Iterable[ClockEvent]],
+                        batch_size: int = 10000) -> IngestReport:
+    """
+    Streams clock events from an iterable of (timestamp, worker_id) or from a file
+    (see read_clock_events) into the system, batch_size events at a time through
+    register_batch. Each batch is applied in timestamp order; an event earlier than
+    its worker's last registered clock event, in this batch or an earlier one, is
+    rejected.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        source = read_clock_events(os.fspath(source))
+
+    events = iter(source)
+    registered = rejected = 0
+    start = time.perf_counter()
+    while True:
+        batch = list(itertools.islice(events, batch_size))
+        if not batch:
+            break
+        batch_registered, batch_rejected = system.register_batch(batch)
+        registered += batch_registered
+        rejected += batch_rejected
+    return IngestReport(registered, rejected, time.perf_counter() - start)
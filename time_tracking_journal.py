@@ -0,0 +1,88 @@
+import struct
+import typing as tp
+
+from record_journal import RecordJournal, decode_text, encode_text
+
+# Record kinds
+ADD_WORKER = 0
+REGISTER = 1
+PROMOTE = 2
+
+_INTS = struct.Struct("<qq")  # add_worker: compensation, 0; register: timestamp, 0;
+                              # promote: compensation, effective timestamp
+_LENGTH = struct.Struct("<I")
+
+def _encode(*texts: str) -> bytes:
+    """Packs strings one after another, each prefixed with its length."""
+    packed = []
+    for text in texts:
+        data = encode_text(text)
+        packed.append(_LENGTH.pack(len(data)) + data)
+    return b"".join(packed)
+
+def _decode(data: bytes, offset: int) -> tp.List[str]:
+    texts = []
+    while offset < len(data):
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        texts.append(decode_text(data[offset:offset + length]))
+        offset += length
+    return texts
+
+class TimeTrackingJournal(RecordJournal):
+    """
+    An append-only log of one TimeTrackingSystemImpl's changes.
+
+    Every successful add_worker, register and promote call is appended to a
+    binary journal as soon as it happens. Every `snapshot_interval` records, the
+    system's derived state (running totals, prefix sums, queued promotions and
+    the rest) is written to a compressed snapshot file and the journal starts
+    over, so startup loads the snapshot and replays at most that many records
+    instead of every clock event ever registered. See RecordJournal for how a
+    crash at any point is recovered from.
+    """
+
+    MAGIC = b"TTJ1"
+
+    def __init__(self, path: str, snapshot_interval: int = 10000, fsync: bool = False):
+        """
+        Opens the journal at path; the snapshot is kept next to it.
+        - snapshot_interval: Records written between snapshots.
+        - fsync: Also force every write to disk, surviving power loss and not only a
+          crash of the process (much slower).
+        """
+        super().__init__(path, path + ".snapshot", snapshot_interval, fsync)
+
+    def _decode_payload(self, kind: int, payload: bytes) -> tp.Tuple:
+        """Returns the arguments of the call a record was written for."""
+        number, effective_timestamp = _INTS.unpack_from(payload)
+        texts = _decode(payload, _INTS.size)
+        if kind == ADD_WORKER:
+            worker_id, position = texts
+            return worker_id, position, number
+        if kind == REGISTER:
+            return number, texts[0]
+        worker_id, position = texts
+        return worker_id, position, number, effective_timestamp
+
+    def append_add_worker(self, worker_id: str, position: str, compensation: int):
+        self._append(ADD_WORKER, _INTS.pack(compensation, 0) + _encode(worker_id, position))
+
+    def append_register(self, timestamp: int, worker_id: str):
+        self._append(REGISTER, _INTS.pack(timestamp, 0) + _encode(worker_id))
+
+    def append_registers(self, events: tp.Sequence[tp.Tuple[int, str]]):
+        """Records many register calls with a single write."""
+        self._append_many([(REGISTER, _INTS.pack(timestamp, 0) + _encode(worker_id))
+                           for timestamp, worker_id in events])
+
+    def append_promote(self, worker_id: str, new_position: str, new_compensation: int, effective_timestamp: int):
+        self._append(PROMOTE, _INTS.pack(new_compensation, effective_timestamp) + _encode(worker_id, new_position))
+
+    def needs_snapshot(self) -> bool:
+        """Returns whether enough records were written since the last snapshot."""
+        return self._state_due()
+
+    def snapshot(self, state: dict):
+        """Saves the system's state and starts a new, empty journal."""
+        self._save_state(state)
@@ -1,23 +1,108 @@
+from array import array
+import bisect
 from collections import defaultdict
+import heapq
+import itertools
+import operator
 import typing as tp
 
+from time_tracking_journal import ADD_WORKER, PROMOTE, REGISTER, TimeTrackingJournal
+
+# The attributes saved in a journal snapshot
+_SNAPSHOT_FIELDS = ("workers_", "work_time_", "history_", "total_time_", "rate_index_", "interval_index_",
+                    "role_time_", "leaderboard_", "headcount_", "promotion_queue_", "promotion_count_",
+                    "current_time_", "activated_now_", "clock_ins_", "clock_outs_")
+
+class _EndpointIndex:
+    """
+    A sorted multiset of timestamps with prefix sums, giving how many are at or before
+    a time and what they add up to in O(log n). Timestamps usually arrive in order and
+    are appended in O(1). Earlier ones wait in a buffer and are folded in by the next
+    query, with one sort and prefix sum pass over the whole array.
+    """
+    __slots__ = ("times", "prefix", "late")
+
+    def __init__(self):
+        self.times = array("q")
+        self.prefix = [0]  # prefix[i] is the sum of times[:i]
+        self.late: tp.List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.times) + len(self.late)
+
+    def add(self, timestamp: int):
+        times = self.times
+        if not times or timestamp >= times[-1]:
+            times.append(timestamp)
+            self.prefix.append(self.prefix[-1] + timestamp)
+        else:
+            self.late.append(timestamp)
+
+    def count_and_sum(self, timestamp: int) -> tp.Tuple[int, int]:
+        if self.late:
+            # The array and the sorted buffer are two runs, which the sort merges in O(n).
+            self.late.sort()
+            self.times = array("q", sorted(itertools.chain(self.times, self.late)))
+            self.prefix = list(itertools.accumulate(self.times, initial=0))
+            self.late = []
+        i = bisect.bisect_right(self.times, timestamp)
+        return i, self.prefix[i]
+
 class TimeTrackingSystemImpl:
     """
     Implements a time-tracking and payroll system for employees.
     """
 
-    def __init__(self):
+    def __init__(self, journal: tp.Optional[TimeTrackingJournal] = None):
         """
-        Initializes the data structures for the system.
+        Initializes the data structures for the system. Given a journal, every change
+        is logged to it, and the system starts from the state it recovers.
         - workers_: Stores current info (position, compensation) for each worker.
-        - work_time_: A log of all clock-in ('ENTER') and clock-out ('EXIT') events.
-        - pending_promotion_: Stores promotions that are scheduled but not yet active.
+        - work_time_: The timestamps of each worker's clock events, packed in an array.
+          Events alternate, so even indexes are clock-ins and odd ones clock-outs.
+        - promotion_queue_: A heap of the promotions scheduled but not yet active, as
+          (effective_timestamp, sequence, worker_id, position, compensation). The
+          sequence number keeps promotions with the same effective time in the order
+          they were scheduled.
+        - current_time_: The latest timestamp registered so far. Promotions activate
+          once it reaches their effective time, whichever worker's event advances it,
+          or as soon as they are scheduled if it already has.
+        - activated_now_: Workers with a promotion that activated at exactly the current
+          time, whose own register at that time is only the activation.
         - history_: A log of each worker's position and compensation changes over time.
+        - total_time_: The running total of each worker's completed session time.
+        - rate_index_: Each worker's compensation as a step function over time: the
+          times it changes, the rate from each of them on, and the pay earned by working
+          nonstop from time 0 up to each of them.
+        - interval_index_: Prefix sums of the time worked and the pay earned in each
+          worker's completed sessions.
+        - role_time_: Each worker's time worked since their current position started.
+        - leaderboard_: For each position, a heap of (-role time, worker_id) in ranking
+          order. Updates push a new entry and leave the old one behind as stale.
+        - headcount_: The number of workers currently in each position.
+        - clock_ins_, clock_outs_: Every worker's clock-in and clock-out times together,
+          for the analytics queries across all workers.
         """
         self.workers_: tp.Dict[str, tp.Tuple[str, int]] = {}
-        self.work_time_: tp.DefaultDict[str, tp.List[tp.Tuple[str, int]]] = defaultdict(list)
-        self.pending_promotion_: tp.Dict[str, tp.Tuple[str, int, int]] = {}
+        self.work_time_: tp.DefaultDict[str, array] = defaultdict(lambda: array("q"))
+        self.promotion_queue_: tp.List[tp.Tuple[int, int, str, str, int]] = []
+        self.promotion_count_ = 0
+        self.current_time_: tp.Optional[int] = None
+        self.activated_now_: tp.Set[str] = set()
         self.history_: tp.DefaultDict[str, tp.List[tp.Tuple[int, str, int]]] = defaultdict(list)
+        self.total_time_: tp.DefaultDict[str, int] = defaultdict(int)
+        self.rate_index_: tp.Dict[str, tp.Tuple[tp.List[int], tp.List[int], tp.List[int]]] = {}
+        self.interval_index_: tp.Dict[str, tp.Tuple[array, tp.List[int]]] = {}
+        self.role_time_: tp.Dict[str, int] = {}
+        self.leaderboard_: tp.DefaultDict[str, tp.List[tp.Tuple[int, str]]] = defaultdict(list)
+        self.headcount_: tp.DefaultDict[str, int] = defaultdict(int)
+        self.clock_ins_ = _EndpointIndex()
+        self.clock_outs_ = _EndpointIndex()
+
+        self.journal_: tp.Optional[TimeTrackingJournal] = None
+        if journal is not None:
+            self._recover(journal)
+            self.journal_ = journal
 
     def add_worker(self, worker_id: str, position: str, compensation: int) -> bool:
         """
@@ -29,53 +114,252 @@ class TimeTrackingSystemImpl:
         self.workers_[worker_id] = (position, int(compensation))
         # Every worker's history starts at timestamp 0
         self.history_[worker_id].append((0, position, int(compensation)))
+        self._build_rate_index(worker_id)
+        self.interval_index_[worker_id] = (array("q", [0]), [0])
+        self.headcount_[position] += 1
+        self._rerank(worker_id, position, 0)
+
+        if self.journal_ is not None:
+            self.journal_.append_add_worker(worker_id, position, int(compensation))
+            self._maybe_snapshot()
         return True
 
     def register(self, timestamp: int, worker_id: str) -> str:
         """
-        Registers a work event (clock-in/out) and activates any pending promotions.
+        Registers a work event (clock-in/out) and activates the promotions that became
+        effective by its timestamp. An event earlier than the worker's last one is invalid.
         """
         if worker_id not in self.workers_:
             return "invalid_request"
+        events = self.work_time_[worker_id]
+        if events and timestamp < events[-1]:
+            return "invalid_request"
 
-        is_purely_promo_activation = False
-        # Promotions are activated by the first register event at or after their effective time.
-        if worker_id in self.pending_promotion_:
-            promo_info = self.pending_promotion_[worker_id]
-            effective_timestamp = promo_info[2]
-            if timestamp >= effective_timestamp:
-                new_position, new_compensation = promo_info[0], promo_info[1]
-                self.workers_[worker_id] = (new_position, new_compensation)
-                
-                # FIX 1: The history should record the change at its effective time, not the registration time.
-                self.history_[worker_id].append((effective_timestamp, new_position, new_compensation))
-                del self.pending_promotion_[worker_id]
-
-                # FIX 2: If registration happens at the exact effective timestamp, it's for activation only.
-                if timestamp == effective_timestamp:
-                    is_purely_promo_activation = True
-        
-        if is_purely_promo_activation:
-            return "registered"
-
-        # Alternate between 'ENTER' and 'EXIT' events.
-        if not self.work_time_[worker_id] or self.work_time_[worker_id][-1][0] == "EXIT":
-            self.work_time_[worker_id].append(("ENTER", timestamp))
-        else:
-            self.work_time_[worker_id].append(("EXIT", timestamp))
-
+        self._register(timestamp, worker_id)
+        if self.journal_ is not None:
+            self.journal_.append_register(timestamp, worker_id)
+            self._maybe_snapshot()
         return "registered"
 
-    def _get_intervals(self, worker_id: str) -> tp.List[tp.Tuple[int, int]]:
+    def register_batch(self, events: tp.Iterable[tp.Tuple[int, str]]) -> tp.Tuple[int, int]:
         """
-        Helper method to convert the event log into a list of completed work intervals.
+        Registers many clock events at once, in timestamp order (events with the same
+        timestamp keep their order), as if register were called for each. Malformed
+        events, events for unknown workers and events earlier than their worker's last
+        clock event are rejected. Returns the numbers of events registered and rejected.
         """
-        intervals = []
+        events = list(events)
+        batch = [event for event in events if type(event) in (tuple, list) and len(event) == 2
+                 and type(event[0]) is int and type(event[1]) is str]
+        rejected = len(events) - len(batch)
+        batch.sort(key=operator.itemgetter(0))
+
+        # The loop below is register inlined, with the clock kept in a local.
+        registered: tp.List[tp.Tuple[int, str]] = []
+        workers, work_time, activated_now = self.workers_, self.work_time_, self.activated_now_
+        now = self.current_time_
+        for timestamp, worker_id in batch:
+            if worker_id not in workers:
+                rejected += 1
+                continue
+            worker_events = work_time[worker_id]
+            if worker_events and timestamp < worker_events[-1]:
+                rejected += 1
+                continue
+            registered.append((timestamp, worker_id))
+
+            if now is None or timestamp > now:
+                self._advance_time(timestamp)
+                now = timestamp
+            if timestamp == now and worker_id in activated_now:
+                activated_now.discard(worker_id)
+            elif len(worker_events) % 2 == 0:
+                worker_events.append(timestamp)
+                self.clock_ins_.add(timestamp)
+            else:
+                self._close_session(worker_id, timestamp)
+
+        if self.journal_ is not None and registered:
+            self.journal_.append_registers(registered)
+            self._maybe_snapshot()
+        return len(registered), rejected
+
+    def _register(self, timestamp: int, worker_id: str):
+        if self.current_time_ is None or timestamp > self.current_time_:
+            self._advance_time(timestamp)
+        # FIX 2: If registration happens at the exact effective timestamp, it's for activation only.
+        if worker_id in self.activated_now_ and timestamp == self.current_time_:
+            self.activated_now_.discard(worker_id)
+            return
+
+        # Events alternate between clock-in and clock-out, so an even count means clocked out.
         events = self.work_time_[worker_id]
-        for i in range(0, len(events) - 1, 2):
-            start_event, end_event = events[i], events[i+1]
-            intervals.append((start_event[1], end_event[1]))
-        return intervals
+        if len(events) % 2 == 0:
+            events.append(timestamp)
+            self.clock_ins_.add(timestamp)
+        else:
+            self._close_session(worker_id, timestamp)
+
+    def _close_session(self, worker_id: str, timestamp: int):
+        """Records a clock-out, adding the session to the running totals and the indexes."""
+        events = self.work_time_[worker_id]
+        enter_timestamp = events[-1]
+        self.total_time_[worker_id] += timestamp - enter_timestamp
+        events.append(timestamp)
+        self.clock_outs_.add(timestamp)
+        worked, earned = self.interval_index_[worker_id]
+        worked.append(worked[-1] + timestamp - enter_timestamp)
+        earned.append(earned[-1] + self._pay_between(worker_id, enter_timestamp, timestamp))
+
+        start_of_current_pos = self.history_[worker_id][-1][0]
+        if timestamp > start_of_current_pos:
+            position = self.workers_[worker_id][0]
+            role_time = self.role_time_[worker_id] + timestamp - max(enter_timestamp, start_of_current_pos)
+            self._rerank(worker_id, position, role_time)
+
+    def _advance_time(self, timestamp: int):
+        """
+        Moves the clock forward to timestamp, which must be later than the current
+        time, and activates, in order, every scheduled promotion that has become
+        effective, at O(log n) per promotion.
+        """
+        self.current_time_ = timestamp
+        self.activated_now_.clear()
+        queue = self.promotion_queue_
+        while queue and queue[0][0] <= timestamp:
+            effective_timestamp, _, worker_id, new_position, new_compensation = heapq.heappop(queue)
+            self._activate_promotion(worker_id, new_position, new_compensation, effective_timestamp)
+            if effective_timestamp == timestamp:
+                self.activated_now_.add(worker_id)
+
+    def _activate_promotion(self, worker_id: str, new_position: str, new_compensation: int,
+                            effective_timestamp: int):
+        old_position = self.workers_[worker_id][0]
+        self.workers_[worker_id] = (new_position, new_compensation)
+
+        # FIX 1: The history should record the change at its effective time, not the registration time.
+        self.history_[worker_id].append((effective_timestamp, new_position, new_compensation))
+        # Pay is unchanged before the earlier of the new and the previous history entry.
+        self._build_rate_index(worker_id)
+        self._reprice_intervals(worker_id, min(effective_timestamp, self.history_[worker_id][-2][0]))
+        self.headcount_[old_position] -= 1
+        self.headcount_[new_position] += 1
+        self._rerank(worker_id, new_position, self._time_since(worker_id, effective_timestamp))
+
+    def _build_rate_index(self, worker_id: str):
+        """
+        Rebuilds the step function of a worker's compensation from their history. Each
+        history entry applies from its timestamp until the next entry's timestamp.
+        """
+        history = self.history_[worker_id]
+        changes: tp.DefaultDict[int, int] = defaultdict(int)
+        for i, (hist_ts, _, hist_comp) in enumerate(history):
+            next_hist_ts = history[i + 1][0] if i + 1 < len(history) else None
+            if next_hist_ts is None or next_hist_ts > hist_ts:
+                changes[hist_ts] += hist_comp
+                if next_hist_ts is not None:
+                    changes[next_hist_ts] -= hist_comp
+
+        times, rates, earned = sorted(changes), [], []
+        rate = total = 0
+        for i, change_ts in enumerate(times):
+            if i:
+                total += rate * (change_ts - times[i - 1])
+            rate += changes[change_ts]
+            rates.append(rate)
+            earned.append(total)
+        self.rate_index_[worker_id] = (times, rates, earned)
+
+    def _earned_until(self, worker_id: str, timestamp: int) -> int:
+        """Returns the pay for working nonstop from time 0 until timestamp."""
+        times, rates, earned = self.rate_index_[worker_id]
+        i = bisect.bisect_right(times, timestamp) - 1
+        if i < 0:
+            return 0
+        return earned[i] + rates[i] * (timestamp - times[i])
+
+    def _pay_between(self, worker_id: str, start: int, end: int) -> int:
+        times, rates, _ = self.rate_index_[worker_id]
+        if len(times) == 1 and start >= times[0]:  # Never promoted: one rate throughout
+            return rates[0] * (end - start)
+        return self._earned_until(worker_id, end) - self._earned_until(worker_id, start)
+
+    def _reprice_intervals(self, worker_id: str, changed_from: int):
+        """Recomputes the pay of the sessions that end after the compensation changed."""
+        starts, ends = self._sessions(worker_id)
+        earned = self.interval_index_[worker_id][1]
+        for i in range(bisect.bisect_right(ends, changed_from), len(starts)):
+            earned[i + 1] = earned[i] + self._pay_between(worker_id, starts[i], ends[i])
+
+    def _time_since(self, worker_id: str, since: int) -> int:
+        """Returns the time worked in completed sessions after `since`."""
+        starts, ends = self._sessions(worker_id)
+        worked = self.interval_index_[worker_id][0]
+        # Sessions from `first` on end after `since`; only the first can start before it.
+        first = bisect.bisect_right(ends, since)
+        if first == len(starts):
+            return 0
+        return worked[-1] - worked[first] - max(0, since - starts[first])
+
+    def _rerank(self, worker_id: str, position: str, role_time: int):
+        """Records a worker's time in role on the leaderboard of their current position."""
+        self.role_time_[worker_id] = role_time
+        board = self.leaderboard_[position]
+        heapq.heappush(board, (-role_time, worker_id))
+        # Drop the stale entries once they make up over half the heap.
+        if len(board) > 2 * self.headcount_[position] + 16:
+            workers, role_times = self.workers_, self.role_time_
+            board[:] = [(negative_time, worker_id) for negative_time, worker_id in board
+                        if workers[worker_id][0] == position and role_times[worker_id] == -negative_time]
+            heapq.heapify(board)
+
+    def _is_current(self, entry: tp.Tuple[int, str], position: str) -> bool:
+        negative_time, worker_id = entry
+        return self.workers_[worker_id][0] == position and self.role_time_[worker_id] == -negative_time
+
+    def _sessions(self, worker_id: str) -> tp.Tuple[memoryview, memoryview]:
+        """
+        Returns the start and end times of a worker's completed sessions as zero-copy
+        views into their event array. Views must not outlive the call using them, as
+        the array cannot grow while they exist.
+        """
+        events = memoryview(self.work_time_[worker_id])
+        completed = len(events) - len(events) % 2
+        return events[0:completed:2], events[1:completed:2]
+
+    # --------------------------------------------------------------------------
+    # Journal and Recovery
+    # --------------------------------------------------------------------------
+
+    def _recover(self, journal: TimeTrackingJournal):
+        """Restores the state saved in the journal's snapshot and replays the records after it."""
+        state, records = journal.recover()
+        if state is not None:
+            for name in _SNAPSHOT_FIELDS:
+                if isinstance(getattr(self, name), defaultdict):
+                    getattr(self, name).update(state[name])
+                else:
+                    setattr(self, name, state[name])
+
+        for kind, arguments in records:
+            if kind == ADD_WORKER:
+                self.add_worker(*arguments)
+            elif kind == REGISTER:
+                self.register(*arguments)
+            elif kind == PROMOTE:
+                self.promote(*arguments)
+
+    def _maybe_snapshot(self):
+        """Writes a snapshot of the derived state once the journal has grown long enough."""
+        if not self.journal_.needs_snapshot():
+            return
+
+        state = {}
+        for name in _SNAPSHOT_FIELDS:
+            value = getattr(self, name)
+            # defaultdicts become plain dicts, as their factories cannot be pickled.
+            state[name] = dict(value) if isinstance(value, defaultdict) else value
+        self.journal_.snapshot(state)
 
     def get(self, worker_id: str) -> str:
         """
@@ -84,52 +368,55 @@ class TimeTrackingSystemImpl:
         if worker_id not in self.workers_:
             return ""
 
-        intervals = self._get_intervals(worker_id)
-        if not intervals:
+        if len(self.work_time_.get(worker_id, ())) < 2:
             return "" # Return empty string if no completed sessions
 
-        total_time = sum(end - start for start, end in intervals)
-        return str(total_time)
+        return str(self.total_time_[worker_id])
 
     def top_n_workers(self, n: int, position: str) -> str:
         """
         Ranks workers in a given position by the time worked in their current role.
+        The position's leaderboard heap is kept up to date as workers register and
+        get promoted, so this pops its top n entries in O(n log W).
         """
-        candidates = [
-            w_id for w_id, info in self.workers_.items() if info[0] == position
-        ]
+        board = self.leaderboard_.get(position, [])
+        if n < 0:  # Like slicing with [:n], leave out the last -n workers
+            n = self.headcount_[position] + n
 
-        def get_time_in_current_position(worker_id: str) -> int:
-            work_intervals = self._get_intervals(worker_id)
-            # The start of the current position is the timestamp of the last history entry.
-            start_of_current_pos = self.history_[worker_id][-1][0]
+        # Ordered by time (descending), then by worker_id (alphabetical ascending) for tie-breaking.
+        ranking: tp.List[tp.Tuple[int, str]] = []
+        while board and len(ranking) < n:
+            entry = heapq.heappop(board)
+            # Stale entries are dropped for good; a duplicate of a taken entry is stale too.
+            if self._is_current(entry, position) and (not ranking or ranking[-1] != entry):
+                ranking.append(entry)
+        for entry in ranking:
+            heapq.heappush(board, entry)
 
-            total_time = 0
-            for start, end in work_intervals:
-                # Only consider work intervals that occur after the current position started.
-                if end > start_of_current_pos:
-                    # Calculate the duration of the work that falls within the current position's timeframe.
-                    overlap_start = max(start, start_of_current_pos)
-                    total_time += end - overlap_start
-            return total_time
-
-        ranking = {
-            worker_id: get_time_in_current_position(worker_id) for worker_id in candidates
-        }
-
-        # Sort by time (descending), then by worker_id (alphabetical ascending) for tie-breaking.
-        sorted_ranking = sorted(ranking.items(), key=lambda item: (-item[1], item[0]))[:n]
-
-        return ", ".join([f"{name}({time})" for name, time in sorted_ranking])
+        return ", ".join([f"{name}({-negative_time})" for negative_time, name in ranking])
 
     def promote(self, worker_id: str, new_position: str, new_compensation: int, effective_timestamp: int) -> str:
         """
-        Schedules a future promotion for a worker.
+        Schedules a future promotion for a worker. A worker can have several queued;
+        they activate in order of effective time once a register reaches it. One that
+        is effective by the current time activates right away.
         """
-        if worker_id not in self.workers_ or worker_id in self.pending_promotion_:
+        if worker_id not in self.workers_:
             return "invalid_request"
 
-        self.pending_promotion_[worker_id] = (new_position, new_compensation, effective_timestamp)
+        if self.current_time_ is not None and effective_timestamp <= self.current_time_:
+            # Every queued promotion is later than the current time, so order is kept.
+            self._activate_promotion(worker_id, new_position, int(new_compensation), effective_timestamp)
+            if effective_timestamp == self.current_time_:
+                self.activated_now_.add(worker_id)
+        else:
+            self.promotion_count_ += 1
+            heapq.heappush(self.promotion_queue_, (effective_timestamp, self.promotion_count_, worker_id,
+                                                   new_position, int(new_compensation)))
+
+        if self.journal_ is not None:
+            self.journal_.append_promote(worker_id, new_position, int(new_compensation), effective_timestamp)
+            self._maybe_snapshot()
         return "success"
 
     def calc_salary(self, worker_id: str, start_timestamp: int, end_timestamp: int) -> str:
@@ -138,36 +425,79 @@ class TimeTrackingSystemImpl:
         """
         if worker_id not in self.workers_:
             return ""
+        return str(self._salary(worker_id, start_timestamp, end_timestamp))
+
+    def calc_payroll(self, start_timestamp: int, end_timestamp: int,
+                     worker_ids: tp.Optional[tp.Iterable[str]] = None) -> tp.Dict[str, int]:
+        """
+        Calculates the salaries of many workers (all of them by default) over the same
+        period in one pass. Unknown worker ids are left out of the result.
+        """
+        if worker_ids is None:
+            worker_ids = self.workers_
+        return {worker_id: self._salary(worker_id, start_timestamp, end_timestamp)
+                for worker_id in worker_ids if worker_id in self.workers_}
 
-        work_intervals = self._get_intervals(worker_id)
-        if not work_intervals:
-            return "0"
-
-        total_compensation = 0
-
-        for work_start, work_end in work_intervals:
-            # Find the intersection of the work interval and the requested salary period.
-            overlap_start = max(work_start, start_timestamp)
-            overlap_end = min(work_end, end_timestamp)
-
-            if overlap_start >= overlap_end:
-                continue  # This work session is outside the requested salary period.
-
-            # For this overlapping work period, find the correct compensation rate(s).
-            for i in range(len(self.history_[worker_id])):
-                hist_ts, _, hist_comp = self.history_[worker_id][i]
-                
-                # Determine the time range for which this historical compensation rate was valid.
-                next_hist_ts = float('inf')
-                if i + 1 < len(self.history_[worker_id]):
-                    next_hist_ts = self.history_[worker_id][i+1][0]
-
-                # Find the final intersection of the work overlap and the history period.
-                final_start = max(overlap_start, hist_ts)
-                final_end = min(overlap_end, next_hist_ts)
-
-                if final_start < final_end:
-                    duration = final_end - final_start
-                    total_compensation += duration * hist_comp
-        
-        return str(total_compensation)
+    def _salary(self, worker_id: str, start_timestamp: int, end_timestamp: int) -> int:
+        """Returns a worker's pay for [start_timestamp, end_timestamp) in O(log n)."""
+        starts, ends = self._sessions(worker_id)
+        earned = self.interval_index_[worker_id][1]
+        # Sessions [first, last) overlap the period. Clock events are in time order,
+        # so both start and end times are sorted.
+        first = bisect.bisect_right(ends, start_timestamp)
+        last = bisect.bisect_left(starts, end_timestamp)
+        if first >= last or start_timestamp >= end_timestamp:
+            return 0
+
+        total_compensation = earned[last] - earned[first]
+        # Leave out the parts of the first and last sessions outside the period.
+        if starts[first] < start_timestamp:
+            total_compensation -= self._pay_between(worker_id, starts[first], start_timestamp)
+        if ends[last - 1] > end_timestamp:
+            total_compensation -= self._pay_between(worker_id, end_timestamp, ends[last - 1])
+        return total_compensation
+
+    # --------------------------------------------------------------------------
+    # Analytics Across Workers
+    # --------------------------------------------------------------------------
+
+    def total_time_between(self, start_timestamp: int, end_timestamp: int) -> int:
+        """
+        Returns the time worked by all workers together in [start_timestamp, end_timestamp),
+        in O(log n). Sessions still open count as worked up to the current time.
+        """
+        if start_timestamp >= end_timestamp:
+            return 0
+        return self._worked_until(end_timestamp) - self._worked_until(start_timestamp)
+
+    def on_the_clock_at(self, timestamp: int) -> int:
+        """Returns how many workers were clocked in at timestamp, in O(log n)."""
+        clock_ins = self.clock_ins_.count_and_sum(timestamp)[0]
+        clock_outs = self.clock_outs_.count_and_sum(timestamp)[0]
+        return clock_ins - clock_outs
+
+    def time_histogram(self, start_timestamp: int, end_timestamp: int, bucket_size: int) -> tp.List[int]:
+        """
+        Splits [start_timestamp, end_timestamp) into buckets of bucket_size (the last one
+        may be shorter) and returns the time worked by all workers in each of them.
+        """
+        if bucket_size <= 0 or start_timestamp >= end_timestamp:
+            return []
+        bounds = list(range(start_timestamp, end_timestamp, bucket_size)) + [end_timestamp]
+        worked = [self._worked_until(bound) for bound in bounds]
+        return [worked[i + 1] - worked[i] for i in range(len(bounds) - 1)]
+
+    def _worked_until(self, timestamp: int) -> int:
+        """
+        Returns the time worked by all workers together before timestamp. Each session
+        [start, end) contributes timestamp - start once started, less timestamp - end
+        once ended, so this only needs the counts and sums of both endpoints.
+        """
+        clock_ins, clock_in_sum = self.clock_ins_.count_and_sum(timestamp)
+        clock_outs, clock_out_sum = self.clock_outs_.count_and_sum(timestamp)
+        worked = (clock_ins * timestamp - clock_in_sum) - (clock_outs * timestamp - clock_out_sum)
+        # Open sessions all started by the current time; stop counting them there.
+        if self.current_time_ is not None and timestamp > self.current_time_:
+            open_sessions = len(self.clock_ins_) - len(self.clock_outs_)
+            worked -= open_sessions * (timestamp - self.current_time_)
+        return worked